@@ -1,8 +1,24 @@
-from flask import Flask, render_template_string, request, jsonify
+import re
+import time
+import random
+import argparse
 from datetime import datetime
 
+from flask import Flask, Response, render_template_string, request, jsonify, stream_with_context
+
 app = Flask(__name__)
 
+# Load-test knobs (set from the command line, see main())
+app.config.update(
+    CHAT_LATENCY_MS=0,          # artificial latency before every answer
+    CHAT_JITTER_MS=0,           # + uniform(0, jitter) ms
+    CHAT_ERROR_RATE=0.0,        # fraction of requests answered with HTTP 500
+    CHAT_TIMEOUT_RATE=0.0,      # fraction of requests that stall for CHAT_TIMEOUT_S
+    CHAT_TIMEOUT_S=30.0,
+    CHAT_TOKEN_DELAY_MS=30,     # delay between tokens on /api/chat/stream
+    CHAT_STREAM=False,          # chat UI streams answers token by token
+)
+
 # Inline HTML for simplicity; includes a minimal "chat UI"
 CHAT_HTML = """
 <!DOCTYPE html>
@@ -34,6 +50,7 @@ CHAT_HTML = """
   </div>
 
   <script>
+    const STREAM = {{ 'true' if stream else 'false' }};
     const input = document.getElementById('chat-input');
     const sendBtn = document.getElementById('send-btn');
     const messages = document.getElementById('messages');
@@ -52,6 +69,7 @@ CHAT_HTML = """
       div.appendChild(meta);
       messages.appendChild(div);
       messages.scrollTop = messages.scrollHeight;
+      return p;
     }
 
     async function sendMessage() {
@@ -62,13 +80,26 @@ CHAT_HTML = """
       sendBtn.disabled = true;
 
       try {
-        const res = await fetch('/api/chat', {
+        const res = await fetch(STREAM ? '/api/chat/stream' : '/api/chat', {
           method: 'POST',
           headers: {'Content-Type': 'application/json'},
           body: JSON.stringify({query: text})
         });
-        const data = await res.json();
-        appendMessage('bot', data.response);
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        if (STREAM) {
+          // Render tokens as they arrive, like a real chat UI
+          const content = appendMessage('bot', '');
+          const reader = res.body.getReader();
+          const decoder = new TextDecoder();
+          while (true) {
+            const {done, value} = await reader.read();
+            if (done) break;
+            content.textContent += decoder.decode(value, {stream: true});
+          }
+        } else {
+          const data = await res.json();
+          appendMessage('bot', data.response);
+        }
       } catch (e) {
         appendMessage('bot', 'Error: ' + e.toString());
       } finally {
@@ -92,18 +123,89 @@ CHAT_HTML = """
 def root():
     return "<p>Go to <a href='/chat'>/chat</a></p>"
 
+def echo_response(query: str) -> str:
+    # Simple "bot": echo + a tiny transformation to mimic processing
+    return f"[EchoBot] You said: {query} | length={len(query)} | time={datetime.utcnow().isoformat()}Z"
+
+def simulate_backend():
+    """Apply configured latency/stalls; returns an error response to send, or None."""
+    cfg = app.config
+    delay = cfg["CHAT_LATENCY_MS"] + random.uniform(0, cfg["CHAT_JITTER_MS"])
+    if random.random() < cfg["CHAT_TIMEOUT_RATE"]:
+        delay += cfg["CHAT_TIMEOUT_S"] * 1000
+    if delay > 0:
+        time.sleep(delay / 1000)
+    if random.random() < cfg["CHAT_ERROR_RATE"]:
+        return jsonify({"error": "injected server error"}), 500
+    return None
+
 @app.route("/chat")
 def chat():
-    return render_template_string(CHAT_HTML)
+    stream = request.args.get("stream", "1" if app.config["CHAT_STREAM"] else "0") == "1"
+    return render_template_string(CHAT_HTML, stream=stream)
 
 @app.route("/api/chat", methods=["POST"])
 def api_chat():
     data = request.get_json(silent=True) or {}
     query = (data.get("query") or "").strip()
-    # Simple "bot": echo + a tiny transformation to mimic processing
-    response = f"[EchoBot] You said: {query} | length={len(query)} | time={datetime.utcnow().isoformat()}Z"
-    return jsonify({"response": response})
+    error = simulate_backend()
+    if error:
+        return error
+    return jsonify({"response": echo_response(query)})
+
+@app.route("/api/chat/stream", methods=["POST"])
+def api_chat_stream():
+    data = request.get_json(silent=True) or {}
+    query = (data.get("query") or "").strip()
+    error = simulate_backend()
+    if error:
+        return error
+    tokens = re.findall(r"\S+\s*", echo_response(query))
+    token_delay = app.config["CHAT_TOKEN_DELAY_MS"] / 1000
+
+    def generate():
+        for i, token in enumerate(tokens):
+            if i and token_delay:
+                time.sleep(token_delay)
+            yield token
+
+    return Response(stream_with_context(generate()), mimetype="text/plain")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local chat demo server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--server", choices=["flask", "waitress"], default="flask",
+                        help="flask dev server (threads or processes) or waitress (needs `pip install waitress`)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="flask server: worker processes (>1 disables threading)")
+    parser.add_argument("--threads", type=int, default=16, help="waitress: worker threads")
+    parser.add_argument("--latency-ms", type=float, default=app.config["CHAT_LATENCY_MS"])
+    parser.add_argument("--jitter-ms", type=float, default=app.config["CHAT_JITTER_MS"])
+    parser.add_argument("--error-rate", type=float, default=app.config["CHAT_ERROR_RATE"])
+    parser.add_argument("--timeout-rate", type=float, default=app.config["CHAT_TIMEOUT_RATE"])
+    parser.add_argument("--timeout-s", type=float, default=app.config["CHAT_TIMEOUT_S"])
+    parser.add_argument("--token-delay-ms", type=float, default=app.config["CHAT_TOKEN_DELAY_MS"])
+    parser.add_argument("--stream", action="store_true", help="chat UI streams answers token by token")
+    args = parser.parse_args(argv)
+
+    app.config.update(
+        CHAT_LATENCY_MS=args.latency_ms,
+        CHAT_JITTER_MS=args.jitter_ms,
+        CHAT_ERROR_RATE=args.error_rate,
+        CHAT_TIMEOUT_RATE=args.timeout_rate,
+        CHAT_TIMEOUT_S=args.timeout_s,
+        CHAT_TOKEN_DELAY_MS=args.token_delay_ms,
+        CHAT_STREAM=args.stream,
+    )
+    if args.server == "waitress":
+        from waitress import serve
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    elif args.processes > 1:
+        app.run(host=args.host, port=args.port, debug=False, threaded=False, processes=args.processes)
+    else:
+        app.run(host=args.host, port=args.port, debug=False, threaded=True)
 
 if __name__ == "__main__":
     # Run local app
-    app.run(host="127.0.0.1", port=5000, debug=False)
+    main()
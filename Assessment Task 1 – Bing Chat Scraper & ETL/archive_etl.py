@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Chunked, dtype-optimized ETL over raw scrape archives.
+
+Reads raw records from scraped_data/ (JSONL, or a JSON array as written by
+save_results) in fixed-size chunks, runs local_chat_scraper.transform() on
+each chunk, shrinks the dtypes (pyarrow-backed strings, downcast integers) and
+streams the rows to the CSV/SQLite/Parquet outputs. Peak memory is bounded by the chunk
+size instead of the archive size.
+
+    python archive_etl.py scraped_data/chat_responses.jsonl --chunksize 50000
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+from typing import Dict, Iterator, List
+
+import pandas as pd
+
+import local_chat_scraper as lcs
+from sinks import CsvSink, frame_rows
+from sqlite_loader import SqliteLoader
+from parquet_sink import write_parquet
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:  # pyarrow not installed: pandas' own string dtype
+    STRING_DTYPE = "string"
+
+# ---------------- Configuration ----------------
+CHUNK_SIZE = 50_000               # records per chunk
+TEXT_COLUMNS = ["query", "response", "timestamp_utc", "echoed_query", "conversation_id"]
+READ_BUFFER = 1 << 16             # characters read at a time from JSON arrays
+# ------------------------------------------------
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+def iter_json_array(path: str) -> Iterator[Dict]:
+    """Yield the objects of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = f.read(READ_BUFFER).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path}: expected a JSON array")
+        pos = 1
+        while True:
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("Unterminated array", buf, pos)
+                obj, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # object straddles the buffer boundary: keep the tail, read more
+                more = f.read(READ_BUFFER)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield obj
+
+def iter_raw_chunks(path: str, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    if path.endswith(".jsonl"):
+        with pd.read_json(path, lines=True, chunksize=chunksize,
+                          dtype=False, convert_dates=False) as reader:
+            yield from reader
+        return
+    batch: List[Dict] = []
+    for record in iter_json_array(path):
+        batch.append(record)
+        if len(batch) >= chunksize:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact text columns and downcast integer columns in place."""
+    for col in TEXT_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype(STRING_DTYPE)
+    if "response_len" in df:
+        df["response_len"] = pd.to_numeric(df["response_len"], downcast="unsigned")
+    if "server_length" in df:
+        df["server_length"] = df["server_length"].astype("UInt32")
+    if "turn_id" in df:               # unbounded with --turns 0, so not downcast
+        df["turn_id"] = pd.to_numeric(df["turn_id"]).astype("Int64")
+    return df
+
+def transform_archive(path: str, chunksize: int = CHUNK_SIZE) -> int:
+    """Transform `path` chunk by chunk and append the rows to CSV, SQLite and Parquet."""
+    csv_sink = CsvSink(lcs.CSV_PATH)
+    db = SqliteLoader(lcs.DB_PATH, lcs.TABLE_NAME)
+    total = 0
+    started = time.perf_counter()
+    try:
+        for chunk in iter_raw_chunks(path, chunksize):
+            df = optimize_dtypes(lcs.transform(optimize_dtypes(chunk)))
+            csv_sink.write(frame_rows(df))
+            db.load_dataframe(df)
+            write_parquet(df, lcs.PARQUET_DIR, target=lcs.BASE_URL)
+            total += len(df)
+            print(f"  … {total:,} rows ({total / (time.perf_counter() - started):,.0f} rows/s)")
+    finally:
+        csv_sink.close()
+        db.close()
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chunked transform/load of a raw scrape archive")
+    parser.add_argument("path", nargs="?", default=lcs.JSONL_PATH,
+                        help="raw .jsonl or .json archive (default: %(default)s)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help="records per chunk (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} not found")
+    print(f"Transforming {args.path} in chunks of {args.chunksize:,}…")
+    total = transform_archive(args.path, args.chunksize)
+    print(f"\nLoaded {total:,} rows:\n  - {lcs.CSV_PATH}\n  - {lcs.DB_PATH}\n  - {lcs.PARQUET_DIR}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Multi-process batch runner for large query files.
+
+Reads queries from a .txt (one per line), .csv (with a header row; the
+"query" column or the one named by --column) or .jsonl ({"query": ...}
+objects or plain strings) file, splits
+them into shards and scrapes the shards on a process pool. Every process has
+its own HTTP session or browser (with its own profile) and appends raw
+records to its own shard file:
+
+    <work dir>/shard-0007.jsonl   records, one JSON object per line
+    <work dir>/shard-0007.log     the scraper's own output for that shard
+    <work dir>/shard-0007.dead.jsonl   browser mode: queries that kept failing
+
+A shard whose process fails or dies, or that finishes with queries still
+unanswered (e.g. server errors), is retried (up to --retries times) with
+only the queries that have no record in its shard file yet; the other shards
+keep running. Dead-lettered queries count as handled; feed the .dead.jsonl
+files back in as input to try them again. The shard layout is saved in plan.json, so running the same
+command again continues unfinished shards. Completed shards are merged
+through the chunked archive ETL into the usual CSV/SQLite/Parquet outputs
+(once each; merged.json lists them).
+
+    python batch_runner.py prompts.csv --mode http --processes 4
+    python batch_runner.py prompts.txt --mode browser --processes 3 --headless --lean
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Set
+
+import local_chat_scraper as lcs
+from archive_etl import transform_archive
+from checkpoint import CheckpointStore, dedup_queries, normalize_query
+from driver_pool import PROFILE_ROOT
+from sinks import JsonlSink
+
+# ---------------- Configuration ----------------
+PROCESSES = max(1, (os.cpu_count() or 2) // 2)
+SHARDS_PER_PROCESS = 4            # smaller shards balance better and retry cheaper
+RETRIES = 2                       # extra attempts per shard
+WORK_DIR = os.path.join(lcs.OUTPUT_DIR, "batch")
+PROGRESS_INTERVAL = 1.0           # seconds between progress lines
+# ------------------------------------------------
+
+def read_queries(path: str, column: str = "query") -> List[str]:
+    """
+    Queries from a .txt, .csv or .jsonl file, in file order (blank ones
+    skipped). A .csv needs a header row naming `column`.
+    """
+    queries: List[str] = []
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if column not in header:
+                raise ValueError(f"{path} has no {column!r} column (header: {', '.join(header) or 'none'}); "
+                                 f"name the query column with --column")
+            col = header.index(column)
+            queries.extend(row[col] for row in reader if len(row) > col)
+    else:
+        with open(path, encoding="utf-8") as f:   # universal newlines: no stray \r from CRLF files
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        obj = json.loads(line)
+                        queries.append(obj["query"] if isinstance(obj, dict) else str(obj))
+            else:
+                queries.extend(line.rstrip("\n") for line in f)
+    return [q for q in queries if q.strip()]
+
+def make_shards(queries: List[str], n: int) -> List[List[str]]:
+    size = -(-len(queries) // n) if queries else 0
+    return [queries[i:i + size] for i in range(0, len(queries), size)] if size else []
+
+def load_plan(work_dir: str, queries: List[str], n: int) -> List[List[str]]:
+    """The work dir's saved shard layout (restricted to `queries`), or a new one."""
+    path = os.path.join(work_dir, "plan.json")
+    if not os.path.exists(path):
+        plan = make_shards(queries, n)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(plan, f, ensure_ascii=False)
+        return plan
+    with open(path, encoding="utf-8") as f:
+        plan = json.load(f)
+    wanted = {normalize_query(q) for q in queries}
+    known = {normalize_query(q) for shard in plan for q in shard}
+    if wanted - known:
+        raise ValueError(f"{work_dir} holds a different job ({len(wanted - known)} queries are not in "
+                         f"its plan.json); use another --work-dir")
+    return [[q for q in shard if normalize_query(q) in wanted] for shard in plan]
+
+def shard_path(work_dir: str, shard_id: int, ext: str = "jsonl") -> str:
+    return os.path.join(work_dir, f"shard-{shard_id:04d}.{ext}")
+
+def done_queries(path: str) -> Set[str]:
+    """
+    Normalized queries already recorded in a shard file. A torn last line (the
+    process died mid-write) is cut off so the retry appends cleanly.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    good = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                done.add(normalize_query(json.loads(line)["query"]))
+            except (ValueError, KeyError):
+                break
+            good += len(line)
+    if good < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    return done
+
+def run_shard(shard_id: int, queries: List[str], opts: Dict, progress) -> int:
+    """Child process: scrape one shard into its own JSONL file; returns records written."""
+    lcs.BASE_URL, lcs.API_URL = opts["base_url"], opts["api_url"]
+    written = 0
+
+    def on_record(record: Dict):
+        nonlocal written
+        sink.write([record])
+        written += 1
+        progress.put(1)
+
+    # Pool processes run many shards: each one's output goes to its own log, only while it runs
+    log = open(shard_path(opts["work_dir"], shard_id, "log"), "a", encoding="utf-8")
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = log
+    sink = None
+    try:
+        sink = JsonlSink(shard_path(opts["work_dir"], shard_id))
+        if opts["mode"] == "http":
+            lcs.scrape_http(queries, concurrency=opts["concurrency"], api_url=lcs.API_URL,
+                            on_record=on_record)
+        else:
+            lcs.scrape_sequential(queries, headless=opts["headless"], completion=opts["completion"],
+                                  on_record=on_record, lean=opts["lean"], typing_mode=opts["typing"],
+                                  turns=opts["turns"],
+                                  profile_root=os.path.join(PROFILE_ROOT, f"shard-{shard_id:04d}"),
+                                  retry=lcs.make_retry(dead_letter_path=shard_path(opts["work_dir"], shard_id,
+                                                                                   "dead.jsonl")))
+    finally:
+        if sink is not None:
+            sink.close()
+        sys.stdout, sys.stderr = stdout, stderr
+        log.close()
+    return written
+
+class Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self._last = 0.0
+
+    def add(self, n: int, force: bool = False):
+        self.done += n
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        eta_s = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta != float("inf") else "--:--:--"
+        pct = 100 * self.done / self.total if self.total else 100.0
+        print(f"\r  {self.done:,}/{self.total:,} ({pct:5.1f}%)  {rate:7.2f} q/s  ETA {eta_s}",
+              end="", flush=True)
+
+def run_batch(queries: List[str], opts: Dict, processes: int, shards: int, retries: int) -> Dict:
+    os.makedirs(opts["work_dir"], exist_ok=True)
+    plan = load_plan(opts["work_dir"], queries, shards)
+    attempts = {i: 0 for i in range(len(plan))}
+    progress = Progress(len(queries))
+    failed: List[int] = []
+    with mp.Manager() as manager:
+        events = manager.Queue()
+
+        def remaining(i: int) -> List[str]:
+            done = done_queries(shard_path(opts["work_dir"], i))
+            done |= done_queries(shard_path(opts["work_dir"], i, "dead.jsonl"))
+            return [q for q in plan[i] if normalize_query(q) not in done]
+
+        # Shards finished by an earlier run of the same work dir count as progress
+        todo = {}
+        for i in range(len(plan)):
+            left = remaining(i)
+            progress.add(len(plan[i]) - len(left))
+            if left:
+                todo[i] = left
+
+        def retry_or_fail(i: int):
+            left = remaining(i)
+            if left and attempts[i] <= retries:
+                todo[i] = left
+            elif left:
+                failed.append(i)
+
+        while todo:
+            pool = ProcessPoolExecutor(max_workers=processes)
+            running = {}
+            for i, left in todo.items():
+                attempts[i] += 1
+                running[pool.submit(run_shard, i, left, opts, events)] = i
+            todo = {}
+            try:
+                while running:
+                    finished, _ = wait(running, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                    while not events.empty():
+                        progress.add(events.get())
+                    progress.add(0)
+                    for future in finished:
+                        i = running[future]
+                        try:
+                            future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            del running[future]
+                            print(f"\n  ! shard {i} failed (attempt {attempts[i]}): {type(e).__name__}: {e}")
+                            retry_or_fail(i)
+                        else:
+                            del running[future]
+                            # Queries the shard gave up on (errors, timeouts) fail the attempt too
+                            left = remaining(i)
+                            if left:
+                                print(f"\n  ! shard {i}: {len(left)} queries got no response "
+                                      f"(attempt {attempts[i]})")
+                                retry_or_fail(i)
+            except BrokenProcessPool:
+                # A process died (e.g. OOM-killed browser): retry every shard that did not finish
+                print("\n  ! a worker process died; restarting the pool")
+                for i in list(running.values()):
+                    retry_or_fail(i)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        while not events.empty():
+            progress.add(events.get())
+        unfinished = {i: len(remaining(i)) for i in range(len(plan))}
+    progress.add(0, force=True)
+    print()
+    dead = sum(len(done_queries(shard_path(opts["work_dir"], i, "dead.jsonl"))) for i in range(len(plan)))
+    return {"shards": len(plan), "failed_shards": sorted(failed),
+            "unfinished": {i: n for i, n in unfinished.items() if n}, "dead_lettered": dead,
+            "seconds": round(time.monotonic() - progress.started, 1)}
+
+def merge_shards(work_dir: str, shards: int, skip: Set[int] = frozenset()) -> int:
+    """
+    Load shard files through the chunked ETL into the CSV/SQLite/Parquet
+    outputs. Shards in `skip` (unfinished) and shards merged before are left
+    out, so a shard is only ever loaded once and in full.
+    """
+    marker = os.path.join(work_dir, "merged.json")
+    merged: List[str] = []
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            merged = json.load(f)
+    total = 0
+    for i in range(shards):
+        path = shard_path(work_dir, i)
+        name = os.path.basename(path)
+        if i in skip or name in merged or not os.path.exists(path) or not os.path.getsize(path):
+            continue
+        total += transform_archive(path)
+        merged.append(name)
+        with open(marker, "w", encoding="utf-8") as f:
+            json.dump(merged, f)
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded multi-process batch scraper")
+    parser.add_argument("input", help="queries file: .txt, .csv or .jsonl")
+    parser.add_argument("--column", default="query", help="csv input: column holding the queries")
+    parser.add_argument("--mode", choices=["browser", "http"], default="http")
+    parser.add_argument("--processes", type=int, default=PROCESSES, help="worker processes (default: %(default)s)")
+    parser.add_argument("--shards", type=int, help=f"shards (default: processes x {SHARDS_PER_PROCESS})")
+    parser.add_argument("--retries", type=int, default=RETRIES, help="extra attempts per failed shard")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="shard files and logs (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=lcs.HTTP_CONCURRENCY,
+                        help="http mode: requests in flight per process")
+    parser.add_argument("--completion", default=",".join(lcs.COMPLETION), help="browser mode: completion strategies")
+    parser.add_argument("--typing", choices=lcs.TYPING_MODES, default=lcs.TYPING_MODE, help="browser mode: typing mode")
+    parser.add_argument("--turns", type=int, default=lcs.CONVERSATION_TURNS,
+                        help="browser mode: turns per conversation before a new chat is opened")
+    parser.add_argument("--headless", action="store_true", default=lcs.HEADLESS)
+    parser.add_argument("--lean", action="store_true", default=lcs.LEAN_BROWSER)
+    parser.add_argument("--resume", action="store_true",
+                        help=f"skip queries already done according to {lcs.CHECKPOINT_PATH}")
+    parser.add_argument("--no-merge", action="store_true", help="leave the shard files unmerged")
+    args = parser.parse_args(argv)
+
+    try:
+        queries = read_queries(args.input, args.column)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Read {len(queries):,} queries from {args.input}")
+    store = CheckpointStore(lcs.CHECKPOINT_PATH, target=lcs.BASE_URL) if args.resume else None
+    queries = store.plan(queries) if store else dedup_queries(queries)
+    shards = args.shards or args.processes * SHARDS_PER_PROCESS
+    print(f"Scraping {len(queries):,} queries in {min(shards, len(queries))} shards "
+          f"on {args.processes} processes ({args.mode} mode)…")
+
+    opts = {"mode": args.mode, "work_dir": args.work_dir, "base_url": lcs.BASE_URL, "api_url": lcs.API_URL,
+            "concurrency": args.concurrency, "headless": args.headless, "lean": args.lean,
+            "typing": args.typing, "turns": args.turns, "completion": [c.strip() for c in args.completion.split(",") if c.strip()]}
+    try:
+        result = run_batch(queries, opts, args.processes, shards, args.retries)
+        print(f"Finished in {result['seconds']}s; per-shard logs in {args.work_dir}/")
+        if result["dead_lettered"]:
+            print(f"  ! {result['dead_lettered']:,} queries dead-lettered; see {args.work_dir}/shard-*.dead.jsonl")
+        unfinished = result["unfinished"]
+        if unfinished:
+            print(f"  ! {sum(unfinished.values()):,} queries in shards {sorted(unfinished)} are not scraped yet; "
+                  f"re-run with the same --work-dir to continue them (they are merged once complete)")
+        if not args.no_merge:
+            print("Merging shards…")
+            merged = merge_shards(args.work_dir, result["shards"], skip=set(unfinished))
+            print(f"Merged {merged:,} rows:\n  - {lcs.CSV_PATH}\n  - {lcs.DB_PATH}\n  - {lcs.PARQUET_DIR}/")
+            if store:
+                for i in range(result["shards"]):
+                    if i not in unfinished:
+                        store.mark_done(done_queries(shard_path(args.work_dir, i)))
+    finally:
+        if store:
+            store.fail_pending()
+            store.close()
+
+if __name__ == "__main__":
+    main()
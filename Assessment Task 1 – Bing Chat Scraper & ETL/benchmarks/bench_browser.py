@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Default vs. lean Chrome profile: memory per session and time-to-ready.
+
+Starts app.py on a free port, then for each profile opens --sessions browsers
+side by side (headless, throwaway profiles) and reports per session:
+
+- launch_s:  setup_driver() (chromedriver + Chrome start)
+- ready_s:   open_chat() until the chat input and send button are present
+- rss_mb:    chromedriver + Chrome processes after --queries queries
+
+    python benchmarks/bench_browser.py --sessions 4 --queries 10
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from typing import Dict, List
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import local_chat_scraper as lcs  # noqa: E402
+from driver_pool import browser_rss_mb, resolve_driver_path  # noqa: E402
+from bench_pipeline import free_port, start_server  # noqa: E402
+
+PROFILES = {"default": False, "lean": True}
+
+def run_profile(name: str, sessions: int, queries: int) -> Dict:
+    lean = PROFILES[name]
+    driver_path = resolve_driver_path()
+    drivers, launch, ready, rss = [], [], [], []
+    try:
+        for _ in range(sessions):
+            t0 = time.perf_counter()
+            driver = lcs.setup_driver(headless=True, driver_path=driver_path, lean=lean)
+            drivers.append(driver)
+            launch.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            lcs.open_chat(driver)
+            ready.append(time.perf_counter() - t0)
+        for driver in drivers:
+            tracker = lcs.MessageTracker.at_end(driver)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(queries):
+                    lcs.send_query_and_capture(driver, f"Profile benchmark query {i}", tracker)
+            rss.append(browser_rss_mb(driver))
+    finally:
+        for driver in drivers:
+            driver.quit()
+    return {"profile": name, "sessions": sessions, "queries_per_session": queries,
+            "launch_s": round(float(np.mean(launch)), 3),
+            "ready_s": round(float(np.mean(ready)), 3),
+            "rss_mb_per_session": round(float(np.mean(rss)), 1),
+            "rss_mb_total": round(float(np.sum(rss)), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Default vs lean browser profile benchmark")
+    parser.add_argument("--sessions", type=int, default=4, help="browsers open at the same time")
+    parser.add_argument("--queries", type=int, default=5, help="queries sent per session before measuring RSS")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="comma-separated (default: %(default)s)")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    lcs.TYPING_MODE = "instant"   # typing speed is not what is measured here
+    port = free_port()
+    server = start_server(port, [])
+    lcs.BASE_URL = f"http://127.0.0.1:{port}/chat"
+    results: List[Dict] = []
+    try:
+        for name in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+            r = run_profile(name, args.sessions, args.queries)
+            results.append(r)
+            print(f"{name:>8}: launch {r['launch_s']:.2f}s  ready {r['ready_s']:.3f}s  "
+                  f"{r['rss_mb_per_session']:.0f} MB/session ({r['rss_mb_total']:.0f} MB for {args.sessions})")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the response extraction step of SimpleBingChatScraper.
+
+Builds a synthetic chat page (--messages turns inside a chat container plus
+--noise unrelated elements around it) and times, per query:
+
+- soup:      BeautifulSoup(page_source, "html.parser") + the five CSS selectors
+             (the previous implementation)
+- lxml page: the "bing" extraction strategy over the whole page
+- lxml scoped: the same strategy over the chat container's outerHTML only
+             (what extract() fetches from the browser)
+
+    python benchmarks/bench_extraction.py --messages 200 --noise 5000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import REGISTRY  # noqa: E402
+
+SELECTORS = ['[data-testid="chat-message-content"]', '.chat-message-content', '.response-content',
+             '[class*="message"]', '[class*="response"]']
+
+def make_page(messages: int, noise: int):
+    turns = []
+    for i in range(messages):
+        turns.append(f'<div class="msg user"><div data-testid="chat-message-content">Question {i}?</div></div>')
+        turns.append(f'<div class="msg bot"><div data-testid="chat-message-content">'
+                     f'Answer {i}: ' + "lorem ipsum dolor sit amet " * 20 + '</div></div>')
+    container = f'<main id="b_sydConvCont">{"".join(turns)}</main>'
+    filler = "".join(f'<div class="card"><a href="/x{i}">Link {i}</a><span>filler text {i}</span></div>'
+                     for i in range(noise))
+    page = f"<html><head><title>t</title></head><body><nav>{filler}</nav>{container}<footer>{filler}</footer></body></html>"
+    return page, container
+
+def soup_extract(page: str) -> str:
+    soup = BeautifulSoup(page, "html.parser")
+    text = ""
+    for selector in SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            text = elements[-1].get_text(strip=True)
+            if len(text) > 20:
+                break
+    return text
+
+def timed(label: str, fn, repeat: int) -> float:
+    fn()   # warm up (and let the strategy learn its selector)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    per = (time.perf_counter() - t0) / repeat
+    print(f"{label:<14} {per * 1000:9.2f} ms/query")
+    return per
+
+def main():
+    parser = argparse.ArgumentParser(description="Response extraction benchmark")
+    parser.add_argument("--messages", type=int, default=200, help="chat turns on the page")
+    parser.add_argument("--noise", type=int, default=5000, help="unrelated elements around the chat")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page, container = make_page(args.messages, args.noise)
+    strategy = REGISTRY["bing"]
+    print(f"Page {len(page) / 1e6:.1f} MB, chat container {len(container) / 1e6:.2f} MB")
+    assert strategy.extract_html(container).text.startswith(f"Answer {args.messages - 1}")
+
+    base = timed("soup", lambda: soup_extract(page), args.repeat)
+    timed("lxml page", lambda: strategy.extract_html(page), args.repeat)
+    scoped = timed("lxml scoped", lambda: strategy.extract_html(container), args.repeat)
+    print(f"Scoped lxml is {base / scoped:.0f}x faster than html.parser on the full page")
+
+if __name__ == "__main__":
+    main()
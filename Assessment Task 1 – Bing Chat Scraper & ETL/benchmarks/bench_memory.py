@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark: bulk transform/load vs. chunked archive ETL.
+
+Writes N synthetic raw records to a JSONL archive, then processes it in a
+fresh subprocess per mode and reports peak RSS and wall time:
+
+- bulk:    load every record, transform() once, load_outputs()
+- chunked: archive_etl.transform_archive() with --chunksize records per chunk
+
+    python benchmarks/bench_memory.py --rows 500000 --chunksize 50000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_mode(mode: str, path: str, out_dir: str, chunksize: int):
+    """Child process: process the archive one way and print a JSON result line."""
+    import local_chat_scraper as lcs
+    lcs.OUTPUT_DIR = out_dir
+    lcs.CSV_PATH = os.path.join(out_dir, "chat_responses.csv")
+    lcs.DB_PATH = os.path.join(out_dir, "chat_responses.db")
+    lcs.PARQUET_DIR = os.path.join(out_dir, "parquet")
+    lcs.JSONL_PATH = os.path.join(out_dir, "chat_responses.jsonl")
+    baseline = peak_rss_mb()
+
+    t0 = time.perf_counter()
+    if mode == "bulk":
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        lcs.load_outputs(lcs.transform(records))
+    else:
+        from archive_etl import transform_archive
+        transform_archive(path, chunksize)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"mode": mode, "seconds": round(elapsed, 2),
+                      "peak_rss_mb": round(peak_rss_mb(), 1),
+                      "import_rss_mb": round(baseline, 1)}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk vs chunked transform memory benchmark")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--run-mode", choices=["bulk", "chunked"], help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.input, args.out, args.chunksize)
+        return
+
+    from bench_transform import iter_records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "archive.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for record in iter_records(args.rows):
+                f.write(json.dumps(record) + "\n")
+        print(f"Archive: {args.rows:,} records, {os.path.getsize(path) / 1e6:.0f} MB")
+
+        for mode in ("bulk", "chunked"):
+            out_dir = os.path.join(tmp, mode)
+            os.makedirs(out_dir)
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-mode", mode, "--input", path,
+                 "--out", out_dir, "--chunksize", str(args.chunksize)],
+                capture_output=True, text=True, check=True)
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{mode:>8}: {result['seconds']:7.2f}s  peak RSS {result['peak_rss_mb']:8.1f} MB "
+                  f"(after imports {result['import_rss_mb']:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: scrape -> transform -> load against a local app.py.
+
+Starts app.py on a free port, then for every mode and query count runs the
+local_chat_scraper backend in-process (outputs go to a temp dir) and reports:
+
+- queries/sec and p50/p95/p99 per-query latency (latency_complete_s)
+- parse time per query (parse_s)
+- CPU seconds / peak RSS of the browser processes (chromedriver + Chrome)
+- time spent in transform() and load_outputs(), and the end-to-end time
+  (with --pipeline the three stages overlap in pipeline.AsyncPipeline, so
+  end-to-end is the extract time plus the tail after the last record)
+
+Results are written as JSON (one file per invocation, tagged with the git
+commit) and can be compared against an earlier file with --baseline.
+
+    python benchmarks/bench_pipeline.py --modes http,browser --counts 20,100 \\
+        --server-args "--latency-ms 50 --jitter-ms 20"
+    python benchmarks/bench_pipeline.py --counts 2000 --pipeline --baseline <phased run>.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shlex
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import psutil
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import local_chat_scraper as lcs  # noqa: E402
+
+# ---------------- Configuration ----------------
+MODES = ["http", "browser"]
+RESULTS_DIR = os.path.join(HERE, "results")
+SAMPLE_INTERVAL = 0.2             # seconds between psutil samples
+SERVER_START_TIMEOUT = 15         # seconds to wait for app.py to answer
+# ------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_server(port: int, server_args: List[str]) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py"), "--port", str(port)] + server_args,
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/chat", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"app.py did not answer on port {port} within {SERVER_START_TIMEOUT}s")
+
+class ResourceSampler:
+    """
+    Samples the child processes of this process (the browsers and their
+    chromedriver) in a background thread: peak total RSS and CPU seconds used.
+    """
+
+    def __init__(self, exclude: Set[int], interval: float = SAMPLE_INTERVAL):
+        self.exclude = exclude
+        self.interval = interval
+        self.peak_rss = 0
+        self._cpu: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = 0
+        for p in psutil.Process().children(recursive=True):
+            if p.pid in self.exclude:
+                continue
+            try:
+                with p.oneshot():
+                    rss += p.memory_info().rss
+                    t = p.cpu_times()
+                    self._cpu[p.pid] = t.user + t.system
+            except psutil.Error:
+                continue   # exited between listing and sampling
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def result(self, wall: float) -> Dict:
+        cpu = sum(self._cpu.values())
+        return {"browser_processes": len(self._cpu),
+                "browser_cpu_s": round(cpu, 3),
+                "browser_cpu_pct": round(100 * cpu / wall, 1) if wall else 0.0,
+                "browser_peak_rss_mb": round(self.peak_rss / 2**20, 1)}
+
+def _percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 4), "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4), "mean": round(float(np.mean(values)), 4)}
+
+def redirect_outputs(out_dir: str, port: int):
+    lcs.OUTPUT_DIR = out_dir
+    lcs.CSV_PATH = os.path.join(out_dir, "chat_responses.csv")
+    lcs.DB_PATH = os.path.join(out_dir, "chat_responses.db")
+    lcs.PARQUET_DIR = os.path.join(out_dir, "parquet")
+    lcs.JSONL_PATH = os.path.join(out_dir, "chat_responses.jsonl")
+    lcs.DEAD_LETTER_PATH = os.path.join(out_dir, "dead_letters.jsonl")
+    lcs.BASE_URL = f"http://127.0.0.1:{port}/chat"
+    lcs.API_URL = f"http://127.0.0.1:{port}/api/chat"
+
+def run_pipelined(mode: str, queries: List[str], args, server_pids: Set[int], out_dir: str):
+    """Extract, transform and load overlapped; returns (records, sampler, stats)."""
+    records: List[Dict] = []
+    pipeline = lcs.open_pipeline(on_record=records.append)
+    log = io.StringIO()
+    try:
+        with ResourceSampler(exclude=server_pids) as sampler, contextlib.redirect_stdout(log):
+            stats = lcs.scrape_pipeline(queries, pipeline, mode=mode, workers=args.workers,
+                                        concurrency=args.concurrency, headless=True,
+                                        completion=args.completion, lean=args.lean,
+                                        profile_root=os.path.join(out_dir, "profiles"))
+    finally:
+        pipeline.close()
+    if args.verbose:
+        print(log.getvalue())
+    return records, sampler, stats
+
+def run_once(mode: str, n: int, args, server_pids: Set[int], out_dir: str) -> Dict:
+    queries = [f"Benchmark query {i}: explain pipeline stage {i % 7}" for i in range(n)]
+    if args.pipeline:
+        records, sampler, stats = run_pipelined(mode, queries, args, server_pids, out_dir)
+        return _result(mode, n, records, sampler, wall=stats["extract_s"], transform_s=None, load_s=None,
+                       end_to_end=stats["total_s"], pipeline=stats)
+    profile_root = os.path.join(out_dir, "profiles")
+    log = io.StringIO()
+    with ResourceSampler(exclude=server_pids) as sampler, contextlib.redirect_stdout(log):
+        t0 = time.perf_counter()
+        if mode == "http":
+            records = lcs.scrape_http(queries, concurrency=args.concurrency, api_url=lcs.API_URL)
+        elif args.workers > 1:
+            records = lcs.run_worker_pool(queries, workers=args.workers, headless=True,
+                                          completion=args.completion, lean=args.lean, profile_root=profile_root)
+        else:
+            records = lcs.scrape_sequential(queries, headless=True, completion=args.completion,
+                                            lean=args.lean, profile_root=profile_root)
+        wall = time.perf_counter() - t0
+    if args.verbose:
+        print(log.getvalue())
+
+    t0 = time.perf_counter()
+    df = lcs.transform(records) if records else None
+    transform_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    if df is not None:
+        lcs.load_outputs(df)
+    load_s = time.perf_counter() - t0
+    return _result(mode, n, records, sampler, wall, transform_s, load_s, end_to_end=wall + transform_s + load_s)
+
+def _result(mode: str, n: int, records: List[Dict], sampler: "ResourceSampler", wall: float,
+            transform_s: Optional[float], load_s: Optional[float], end_to_end: float,
+            pipeline: Optional[Dict] = None) -> Dict:
+    latencies = [r["latency_complete_s"] for r in records if r.get("latency_complete_s") is not None]
+    parse = [r["parse_s"] for r in records if r.get("parse_s") is not None]
+    return {
+        "mode": mode,
+        "queries": n,
+        "ok": len(records),
+        "failed": n - len(records),
+        "wall_s": round(wall, 3),
+        "qps": round(len(records) / wall, 2) if wall else 0.0,
+        "latency_s": _percentiles(latencies),
+        "parse_ms_per_query": round(1000 * float(np.mean(parse)), 3) if parse else None,
+        "transform_s": round(transform_s, 4) if transform_s is not None else None,
+        "load_outputs_s": round(load_s, 4) if load_s is not None else None,
+        "end_to_end_s": round(end_to_end, 3),
+        "pipeline": pipeline,
+        **sampler.result(wall),
+    }
+
+def compare(runs: List[Dict], baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["mode"], r["queries"]): r for r in baseline["runs"] if "error" not in r}
+    print(f"\nvs. {baseline_path} (commit {baseline.get('commit')}):")
+    for r in runs:
+        b = before.get((r["mode"], r["queries"]))
+        if b is None or "error" in r:
+            continue
+        deltas = []
+        for label, new, old in [("qps", r["qps"], b["qps"]),
+                                ("p95", r["latency_s"]["p95"], b["latency_s"]["p95"]),
+                                ("transform", r["transform_s"], b["transform_s"]),
+                                ("load", r["load_outputs_s"], b["load_outputs_s"]),
+                                ("end-to-end", r.get("end_to_end_s"), b.get("end_to_end_s"))]:
+            if new is not None and old:
+                deltas.append(f"{label} {100 * (new - old) / old:+.1f}%")
+        print(f"  {r['mode']:>8} x{r['queries']:<6} " + ", ".join(deltas))
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scrape/transform/load benchmark")
+    parser.add_argument("--modes", default="http", help=f"comma-separated, from {MODES} (default: %(default)s)")
+    parser.add_argument("--counts", default="20,100", help="comma-separated query counts (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=lcs.HTTP_CONCURRENCY, help="http mode: requests in flight")
+    parser.add_argument("--workers", type=int, default=1, help="browser mode: parallel sessions")
+    parser.add_argument("--completion", default=",".join(lcs.COMPLETION),
+                        help="browser mode: completion strategies (default: %(default)s)")
+    parser.add_argument("--lean", action="store_true", help="browser mode: lean Chrome profile")
+    parser.add_argument("--no-delays", action="store_true",
+                        help="browser mode: disable typing delays and the rate limit")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run extract/transform/load as the async pipeline instead of phased")
+    parser.add_argument("--server-args", default="", help='extra app.py flags, e.g. "--latency-ms 50 --stream"')
+    parser.add_argument("--output", help="result file (default: benchmarks/results/pipeline-<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the scrapers' own output")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+    counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    args.completion = [c.strip() for c in args.completion.split(",") if c.strip()]
+    if args.no_delays:
+        lcs.TYPING_MODE = "instant"
+        lcs.RATE = lcs.MAX_RATE = 1000
+
+    port = free_port()
+    server_args = shlex.split(args.server_args)
+    server = start_server(port, server_args)
+    server_pids = {server.pid} | {p.pid for p in psutil.Process(server.pid).children(recursive=True)}
+    commit = git_commit()
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in modes:
+                for n in counts:
+                    out_dir = os.path.join(tmp, f"{mode}-{n}")
+                    redirect_outputs(out_dir, port)
+                    try:
+                        r = run_once(mode, n, args, server_pids, out_dir)
+                    except Exception as e:   # e.g. no Chrome on this host: keep the other runs
+                        print(f"{mode:>8} x{n:<6} ! {type(e).__name__}: {e}")
+                        runs.append({"mode": mode, "queries": n, "error": f"{type(e).__name__}: {e}"})
+                        continue
+                    runs.append(r)
+                    lat = r["latency_s"]
+                    stages = (f"tail {r['pipeline']['tail_s']:.3f}s" if r["pipeline"] else
+                              f"transform {r['transform_s']:.3f}s  load {r['load_outputs_s']:.3f}s")
+                    print(f"{mode:>8} x{n:<6} {r['qps']:8.2f} q/s  p50 {lat['p50']}s p95 {lat['p95']}s "
+                          f"p99 {lat['p99']}s  parse {r['parse_ms_per_query']}ms  "
+                          f"{stages}  end-to-end {r['end_to_end_s']:.3f}s  "
+                          f"browser {r['browser_cpu_s']}s CPU / {r['browser_peak_rss_mb']} MB"
+                          + (f"  ({r['failed']} failed)" if r["failed"] else ""))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    result = {
+        "commit": commit,
+        "started_utc": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "server_args": server_args,
+        "settings": {"concurrency": args.concurrency, "workers": args.workers,
+                     "completion": args.completion, "lean": args.lean, "no_delays": args.no_delays,
+                     "pipeline": args.pipeline},
+        "runs": runs,
+    }
+    path = args.output or os.path.join(
+        RESULTS_DIR, f"pipeline-{commit or 'nogit'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {path}")
+    if args.baseline:
+        compare(runs, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark for sqlite_loader.SqliteLoader against pandas' to_sql.
+
+Transforms N synthetic records once, then times:
+- load_dataframe() into an empty table
+- the same load again (pure upserts; row count must not change)
+- df.to_sql(if_exists="replace"), the previous load path, for reference
+
+Rows sharing a (timestamp_utc, query_hash) key are one row in the table; the
+benchmark reports how many were merged and fails if the table holds anything
+but one row per distinct key.
+
+    python benchmarks/bench_sqlite.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bench_transform import make_records  # noqa: E402
+from local_chat_scraper import transform, TABLE_NAME  # noqa: E402
+from sqlite_loader import SqliteLoader, query_hashes  # noqa: E402
+
+def timed(label: str, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - t0:7.2f}s")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite bulk loader benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-to-sql", action="store_true", help="skip the to_sql reference run")
+    args = parser.parse_args()
+
+    df = transform(make_records(args.rows))
+    keys = len(set(zip(df["timestamp_utc"].tolist(), query_hashes(df["query"]))))
+    print(f"{len(df):,} transformed rows, {keys:,} distinct (timestamp_utc, query_hash) keys")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = SqliteLoader(os.path.join(tmp, "bench.db"), TABLE_NAME)
+        timed("load_dataframe (insert)", lambda: loader.load_dataframe(df))
+        inserted = loader.count()
+        timed("load_dataframe (upsert)", lambda: loader.load_dataframe(df))
+        upserted = loader.count()
+        loader.close()
+        print(f"{'rows in table':<28} {upserted:,}")
+        if len(df) > keys:
+            print(f"  ! {len(df) - keys:,} rows share a key with another row and were merged into it")
+        if inserted != keys or upserted != keys:
+            raise SystemExit(f"expected {keys:,} rows (one per key), got {inserted:,} after the insert "
+                             f"and {upserted:,} after the upsert")
+
+        if not args.skip_to_sql:
+            conn = sqlite3.connect(os.path.join(tmp, "to_sql.db"))
+            timed("to_sql (replace)", lambda: df.to_sql(TABLE_NAME, conn, if_exists="replace", index=False))
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark for local_chat_scraper.transform().
+
+Builds N synthetic EchoBot records (a few malformed ones included) and times
+the vectorized transform. Usage:
+
+    python benchmarks/bench_transform.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_chat_scraper import transform  # noqa: E402
+
+WORDS = ["what", "is", "ai", "explain", "selenium", "learning", "data", "pipeline", "scraper"]
+
+def iter_records(n: int, seed: int = 42):
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    for i in range(n):
+        query = " ".join(rnd.choices(WORDS, k=rnd.randint(2, 12)))
+        server = base + timedelta(milliseconds=i * 10)
+        client = server + timedelta(milliseconds=rnd.randint(5, 400))
+        if i % 1000 == 999:
+            response = "Error: TypeError: Failed to fetch"
+        else:
+            response = f"[EchoBot] You said: {query} | length={len(query)} | time={server.isoformat()}Z"
+        yield {
+            "query": query,
+            "response": response,
+            "timestamp_utc": client.isoformat() + "Z",
+            "response_len": len(response),
+        }
+
+def make_records(n: int, seed: int = 42):
+    return list(iter_records(n, seed))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    records = make_records(args.rows)
+    print(f"Generated {args.rows:,} records in {time.perf_counter() - t0:.2f}s")
+
+    timings = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        df = transform(records)
+        timings.append(time.perf_counter() - t0)
+
+    best = min(timings)
+    print(f"transform(): best {best:.2f}s of {args.repeat} ({args.rows / best:,.0f} rows/s)")
+    print(f"  parsed: {int(df['server_length'].notna().sum()):,}  "
+          f"length_mismatch: {int(df['length_mismatch'].sum()):,}  "
+          f"query_mismatch: {int(df['query_mismatch'].sum()):,}  "
+          f"median latency: {df['latency_ms'].median():.1f} ms")
+
+if __name__ == "__main__":
+    main()
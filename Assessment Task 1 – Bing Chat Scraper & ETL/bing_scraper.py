@@ -8,7 +8,6 @@ for testing and development purposes.
 """
 
 import time
-import random
 import json
 import os
 from datetime import datetime
@@ -16,19 +15,74 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
+
+from completion import DomStability, wait_for_completion
+from sinks import JsonlSink
+from checkpoint import CheckpointStore, dedup_queries
+from cache import ResponseCache
+from metrics import span, write_metrics, summary
+from browser_profile import apply_lean_options, block_resources
+from rate_limit import AdaptiveRateLimiter
+from typing_engine import TypingEngine, mode_for
+from extraction import REGISTRY, for_url
+from driver_pool import resolve_driver_path, save_cookies, load_cookies
+from conversation import Conversation, CONVERSATION_TURNS
+from resilience import DeadLetterQueue, RetryPolicy, SessionFailed, RELOAD, MAX_ATTEMPTS
+
+BING_CHAT_URL = "https://bing.com/chat"
+
+# Adaptive pacing (queries/s): starts near the old 5-10 s gap, speeds up while
+# answers come back quickly, halves and backs off on timeouts
+BING_RATE, BING_MIN_RATE, BING_MAX_RATE = 0.13, 0.02, 0.25
+
+# Bing renders answers inside shadow roots, so watch the whole visible page text
+PAGE_TEXT_JS = "return document.body ? document.body.innerText : '';"
 
 
 class SimpleBingChatScraper:
-    def __init__(self, email="", password="", headless=False):
+    def __init__(self, email="", password="", headless=False, response_timeout=60, quiet_ms=1500,
+                 stream_dir=None, checkpoint_path=None, cache_path=None, bypass_cache=False,
+                 profile_dir=None, cookie_path=None, lean=False, typing_mode=None, typing_wpm=100,
+                 extraction=None, dead_letter_path=None, max_attempts=MAX_ATTEMPTS,
+                 conversation_turns=CONVERSATION_TURNS):
         self.email = email
         self.password = password
         self.headless = headless
+        self.response_timeout = response_timeout  # max wait for an answer to finish
+        self.quiet_ms = quiet_ms  # answer counts as finished after this long without changes
         self.driver = None
         self.scraped_data = []
+        self.collected = 0
+        # With stream_dir, each response is appended to bing_responses.jsonl as soon as
+        # it is extracted instead of being held in memory until save_data()
+        self.sink = JsonlSink(os.path.join(stream_dir, "bing_responses.jsonl")) if stream_dir else None
+        # With checkpoint_path, queries already saved by an earlier run are skipped
+        self.checkpoint = CheckpointStore(checkpoint_path, target=BING_CHAT_URL) if checkpoint_path else None
+        # With cache_path, repeated queries are answered from the response cache
+        self.cache = (ResponseCache(cache_path, target=BING_CHAT_URL, bypass=bypass_cache)
+                      if cache_path else None)
+        # A persistent Chrome profile and saved cookies let later runs skip the login
+        self.profile_dir = profile_dir
+        self.cookie_path = cookie_path
+        self.lean = lean  # eager loads, small viewport, no images/fonts/CSS
+        # Named extraction strategy (see extraction.REGISTRY); default: the one for bing.com
+        self.extractor = REGISTRY[extraction] if extraction else for_url(BING_CHAT_URL)
+        # How queries are typed: instant, js, chunked or human (default for bing.com: human)
+        self.typing = TypingEngine(typing_mode or mode_for(BING_CHAT_URL), wpm=typing_wpm)
+        self.limiter = AdaptiveRateLimiter(rate=BING_RATE, min_rate=BING_MIN_RATE, max_rate=BING_MAX_RATE,
+                                           increase=0.01, target_latency_s=response_timeout / 2,
+                                           max_concurrency=1)
+        # Failed sends are retried after a page reload or browser restart; with
+        # dead_letter_path, queries that keep failing are written there
+        dead_letters = DeadLetterQueue(dead_letter_path, target=BING_CHAT_URL) if dead_letter_path else None
+        self.retry = RetryPolicy(dead_letters, max_attempts=max_attempts)
+        # Queries are sent as turns of a conversation; after conversation_turns a new
+        # chat is opened so the page and Bing's context stay small
+        self.conversation = Conversation(conversation_turns)
 
     def setup_driver(self):
         """Setup Chrome WebDriver with basic options"""
@@ -40,11 +94,19 @@ class SimpleBingChatScraper:
         # Basic options
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--window-size=1920,1080")
+        if self.lean:
+            apply_lean_options(options)
+        else:
+            options.add_argument("--disable-extensions")
+            options.add_argument("--window-size=1920,1080")
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            options.add_argument(f"--user-data-dir={os.path.abspath(self.profile_dir)}")
 
         try:
-            self.driver = webdriver.Chrome(options=options)
+            self.driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+            if self.lean:
+                block_resources(self.driver)
             print("✅ Chrome WebDriver initialized successfully")
             return True
         except Exception as e:
@@ -56,16 +118,20 @@ class SimpleBingChatScraper:
         """Simple login to Bing Chat"""
         try:
             print("🌐 Navigating to Bing Chat...")
-            self.driver.get("https://bing.com/chat")
-            time.sleep(3)
+            restored = load_cookies(self.driver, self.cookie_path, BING_CHAT_URL) if self.cookie_path else 0
+            if restored:
+                print(f"🍪 Restored {restored} saved cookies")
+            else:
+                self.driver.get(BING_CHAT_URL)
 
-            # Check if already logged in
+            # Check if already logged in (saved session, persistent profile or no login needed)
             try:
-                chat_input = self.driver.find_element(By.CSS_SELECTOR, "textarea")
-                if chat_input:
-                    print("✅ Already logged in or no login required")
-                    return True
-            except:
+                WebDriverWait(self.driver, 5).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
+                )
+                print("✅ Already logged in or no login required")
+                return True
+            except TimeoutException:
                 pass
 
             # Look for sign-in button
@@ -104,6 +170,8 @@ class SimpleBingChatScraper:
                     print("⚠️ No credentials provided. Manual login may be required.")
                     input("Please complete login manually and press Enter to continue...")
 
+                if self.cookie_path:
+                    print(f"🍪 Saved {save_cookies(self.driver, self.cookie_path)} cookies for the next run")
                 return True
 
             except TimeoutException:
@@ -114,104 +182,188 @@ class SimpleBingChatScraper:
             print(f"❌ Login failed: {e}")
             return False
 
-    def send_query(self, query):
-        """Send a query to Bing Chat and get response"""
-        try:
-            print(f"📝 Sending query: {query}")
+    def _store_result(self, result):
+        if self.sink:
+            self.sink.write([result])
+            if self.checkpoint:
+                self.checkpoint.mark_done([result['query']])
+        else:
+            self.scraped_data.append(result)
+        self.collected += 1
 
-            # Find chat input
-            chat_input = WebDriverWait(self.driver, 15).until(
+    def send_query(self, query):
+        """Send a query to Bing Chat and get response (retried on errors)"""
+        if self.cache:
+            cached = self.cache.get(query)
+            if cached:
+                self._store_result(cached)
+                print(f"⚡ Cache hit for: {query}")
+                return cached
+
+        return self.retry.run(query, lambda: self._send_once(query), self._recover)
+
+    def _new_chat(self):
+        """Open a fresh chat page (a new Bing conversation)"""
+        print("🆕 Starting a new conversation...")
+        with span("new_chat", source="bing"):
+            self.driver.get(BING_CHAT_URL)
+            WebDriverWait(self.driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
+            )
+        self.conversation.restart()
+
+    def _recover(self, action):
+        """Reload the chat page, or restart the browser and log in again"""
+        self.conversation.restart()  # either way the old chat context is gone
+        if action == RELOAD:
+            print("🔄 Reloading Bing Chat...")
+            self.driver.get(BING_CHAT_URL)
+            WebDriverWait(self.driver, 15).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
             )
+            return
+        print("🔄 Restarting the browser...")
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        if not (self.setup_driver() and self.login_to_bing()):
+            raise RuntimeError("could not start a new logged-in browser")
+
+    def _send_once(self, query):
+        """One attempt at a query; raises on errors so the retry policy can classify them"""
+        with span("rate_limit", source="bing"):
+            self.limiter.acquire(BING_CHAT_URL)
+        try:
+            if self.conversation.full:
+                self._new_chat()
+            conversation_id, turn_id = self.conversation.next_turn()
+            print(f"📝 Sending query (turn {turn_id}): {query}")
+
+            with span("type", source="bing"):
+                # Find chat input
+                chat_input = WebDriverWait(self.driver, 15).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "textarea"))
+                )
 
-            # Clear and type query
-            chat_input.clear()
-            for char in query:
-                chat_input.send_keys(char)
-                time.sleep(random.uniform(0.05, 0.15))  # Human-like typing
+                # Clear and type query
+                chat_input.clear()
+                typing_s = self.typing.type(self.driver, chat_input, query)
+                print(f"⌨️ Typed in {typing_s:.2f}s ({self.typing.mode})")
 
-            time.sleep(1)
+            with span("sleep", source="bing"):
+                time.sleep(1)
 
             # Send query
+            previous = self.extractor.extract(self.driver).text
             chat_input.send_keys(Keys.RETURN)
             print("📤 Query sent, waiting for response...")
 
-            # Wait for response
-            time.sleep(8)  # Give time for response to generate
-
-            # Extract response using BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-
-            # Look for response content
-            response_text = ""
-
-            # Try different selectors for response content
-            selectors = [
-                '[data-testid="chat-message-content"]',
-                '.chat-message-content',
-                '.response-content',
-                '[class*="message"]',
-                '[class*="response"]'
-            ]
-
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    # Get the last response (most recent)
-                    response_text = elements[-1].get_text(strip=True)
-                    if len(response_text) > 20:  # Valid response
-                        break
-
-            if not response_text:
-                # Fallback: get all text from page and try to extract response
-                page_text = soup.get_text()
-                # This is a simplified extraction - in practice, you'd need more sophisticated parsing
-                if query.lower() in page_text.lower():
-                    response_text = "Response extracted from page content (simplified)"
+            echoed = " ".join(query.split())
+
+            def answer_appeared(driver):
+                # Our own bubble and a pause before streaming starts ("Searching...") are not an answer
+                found = self.extractor.extract(driver)
+                return found.selector is not None and found.text not in (previous, echoed)
+
+            # Wait for an answer, then until it stops changing
+            wait_time = None
+            try:
+                with span("wait", source="bing"):
+                    latency = wait_for_completion(
+                        self.driver, [DomStability(script=PAGE_TEXT_JS, quiet_ms=self.quiet_ms)],
+                        timeout=self.response_timeout, gate=answer_appeared
+                    )
+                wait_time = latency['complete_s']
+                self.limiter.record_success(BING_CHAT_URL, wait_time)
+                print(f"⏱️ Response completed in {wait_time:.1f}s")
+            except TimeoutException:
+                backoff = self.limiter.record_timeout(BING_CHAT_URL)
+                print(f"⚠️ Response still changing after timeout, extracting what is there "
+                      f"(backing off {backoff:.0f}s)")
+
+            with span("parse", source="bing"):
+                # Parse only the chat container with lxml; the selector that
+                # matched last time is tried first
+                extracted = self.extractor.extract(self.driver)
+                response_text = extracted.text
+
+                if not response_text and extracted.root is not None:
+                    # Fallback: get all text from the container and try to extract response
+                    page_text = extracted.root.text_content()
+                    # This is a simplified extraction - in practice, you'd need more sophisticated parsing
+                    if query.lower() in page_text.lower():
+                        response_text = "Response extracted from page content (simplified)"
 
             if response_text:
                 result = {
                     'query': query,
                     'response': response_text,
                     'timestamp': datetime.now().isoformat(),
-                    'response_length': len(response_text)
+                    'response_length': len(response_text),
+                    'wait_time': wait_time,
+                    'typing_s': round(typing_s, 4),
+                    'conversation_id': conversation_id,
+                    'turn_id': turn_id,
+                    'cached': False
                 }
 
-                self.scraped_data.append(result)
+                if self.cache:
+                    self.cache.put(query, result)
+                self._store_result(result)
                 print(f"✅ Response extracted ({len(response_text)} characters)")
                 return result
             else:
                 print("⚠️ No response found")
                 return None
 
-        except Exception as e:
-            print(f"❌ Failed to send query: {e}")
-            return None
+        except Exception:
+            self.limiter.record_timeout(BING_CHAT_URL)
+            raise
 
     def scrape_queries(self, queries):
         """Scrape multiple queries with rate limiting"""
+        if self.checkpoint:
+            todo = self.checkpoint.plan(queries)
+            print(f"📌 Checkpoint: skipping {len(queries) - len(todo)} done/duplicate queries")
+            queries = todo
+        else:
+            queries = dedup_queries(queries)
         print(f"🚀 Starting to scrape {len(queries)} queries...")
 
         for i, query in enumerate(queries, 1):
             print(f"\n--- Query {i}/{len(queries)} ---")
 
-            result = self.send_query(query)
+            try:
+                result = self.send_query(query)
+            except SessionFailed as e:
+                print(f"🛑 Stopping: {e}")
+                break
 
             if result:
                 print(f"✅ Query {i} completed successfully")
             else:
                 print(f"❌ Query {i} failed")
 
-            # Rate limiting
-            if i < len(queries):
-                delay = random.uniform(5, 10)
-                print(f"⏳ Waiting {delay:.1f} seconds before next query...")
-                time.sleep(delay)
-
-        print(f"\n🎉 Scraping completed! Collected {len(self.scraped_data)} responses")
+        print(f"\n🎉 Scraping completed! Collected {self.collected} responses")
+        if self.cache:
+            print(f"⚡ Cache: {self.cache.stats()}")
+        print(f"🚦 Rate limiter: {self.limiter.stats()}")
+        print(f"🔁 Retries: {self.retry.stats()}")
+        if self.retry.dead_letters and self.retry.dead_letters.count:
+            print(f"☠️ {self.retry.dead_letters.count} queries written to {self.retry.dead_letters.path}")
+        print(f"⏱️ Stage timings:\n{summary()}")
+        if self.checkpoint:
+            failed = self.checkpoint.fail_pending()
+            if failed:
+                print(f"📌 Checkpoint: {failed} queries will be retried on the next run")
 
     def save_data(self, output_dir="scraped_data"):
         """Save scraped data to files"""
+        if self.sink:
+            print(f"💾 Data already streamed to:\n   📄 {self.sink.path}")
+            return
+
         if not self.scraped_data:
             print("⚠️ No data to save")
             return
@@ -232,12 +384,24 @@ class SimpleBingChatScraper:
                 f.write(
                     f"{item['query']}\t{item['response'][:100]}...\t{item['timestamp']}\t{item['response_length']}\n")
 
+        if self.checkpoint:
+            self.checkpoint.mark_done(item['query'] for item in self.scraped_data)
+
         print(f"💾 Data saved to:")
         print(f"   📄 {json_file}")
         print(f"   📄 {csv_file}")
 
     def cleanup(self):
         """Close browser and cleanup"""
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+        if self.checkpoint:
+            self.checkpoint.close()
+            self.checkpoint = None
+        if self.cache:
+            self.cache.close()
+            self.cache = None
         if self.driver:
             self.driver.quit()
             print("🔒 Browser closed")
@@ -260,14 +424,23 @@ def main():
     password = input("Enter your password (or press Enter to skip): ").strip() if email else ""
 
     # Create scraper
-    scraper = SimpleBingChatScraper(email=email, password=password, headless=False)
+    scraper = SimpleBingChatScraper(email=email, password=password, headless=False,
+                                    stream_dir="scraped_data",
+                                    checkpoint_path="scraped_data/bing_checkpoints.db",
+                                    cache_path="scraped_data/bing_cache.db",
+                                    profile_dir="scraped_data/profiles/bing",
+                                    cookie_path="scraped_data/bing_cookies.json",
+                                    dead_letter_path="scraped_data/bing_dead_letters.jsonl")
 
     try:
         # Setup and run
         if scraper.setup_driver():
-            if scraper.login_to_bing():
+            with span("login", source="bing"):
+                logged_in = scraper.login_to_bing()
+            if logged_in:
                 scraper.scrape_queries(test_queries)
                 scraper.save_data()
+                write_metrics("scraped_data/bing_metrics.json")
             else:
                 print("❌ Login failed")
         else:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Response cache in front of the send functions.
+
+Entries are keyed by normalized query + target (same key as the checkpoint
+store) and expire after `ttl` seconds. A size-bounded in-memory LRU serves hot
+entries in microseconds; a SQLite table keeps them across runs. Hits return a
+copy of the stored record with "cached": True.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from checkpoint import query_key
+
+# ---------------- Configuration ----------------
+CACHE_TTL = 24 * 3600             # seconds an entry stays valid
+CACHE_SIZE = 1024                 # entries kept in the in-memory LRU
+TABLE_NAME = "response_cache"
+# ------------------------------------------------
+
+class ResponseCache:
+    def __init__(self, path: Optional[str], target: str, ttl: float = CACHE_TTL,
+                 max_entries: int = CACHE_SIZE, bypass: bool = False):
+        """
+        `path=None` keeps the cache in memory only. With `bypass=True` lookups
+        always miss, but fresh records are still stored.
+        """
+        self.target = target
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+                        key TEXT PRIMARY KEY,
+                        target TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        record TEXT NOT NULL,
+                        stored_at REAL NOT NULL
+                    )""")
+
+    def _remember(self, key: str, stored_at: float, record: Dict):
+        self._lru[key] = (stored_at, record)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, query: str) -> Optional[Dict]:
+        if self.bypass:
+            return None
+        key = query_key(query, self.target)
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1], cached=True)
+                del self._lru[key]
+            if self._conn is not None:
+                row = self._conn.execute(f"SELECT stored_at, record FROM {TABLE_NAME} WHERE key = ?",
+                                         (key,)).fetchone()
+                if row and now - row[0] < self.ttl:
+                    record = json.loads(row[1])
+                    self._remember(key, row[0], record)
+                    self.hits += 1
+                    return dict(record, cached=True)
+            self.misses += 1
+            return None
+
+    def put(self, query: str, record: Dict):
+        key = query_key(query, self.target)
+        now = time.time()
+        record = {k: v for k, v in record.items() if k != "cached"}
+        with self._lock:
+            self._remember(key, now, record)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {TABLE_NAME} (key, target, query, record, stored_at) "
+                        f"VALUES (?, ?, ?, ?, ?)",
+                        (key, self.target, query, json.dumps(record, ensure_ascii=False), now))
+
+    def split(self, queries: Iterable[str]) -> Tuple[List[Dict], List[str]]:
+        """(cached records, queries that still have to be sent)."""
+        hits, misses = [], []
+        for q in queries:
+            record = self.get(q)
+            if record is None:
+                misses.append(q)
+            else:
+                hits.append(record)
+        return hits, misses
+
+    def fetch(self, query: str, send: Callable[[str], Optional[Dict]]) -> Optional[Dict]:
+        """Return the cached record for `query`, or call `send(query)` and cache its result."""
+        record = self.get(query)
+        if record is not None:
+            return record
+        record = send(query)
+        if record is not None:
+            self.put(query, record)
+        return record
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries_in_memory": len(self._lru)}
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the disk table."""
+        if self._conn is None:
+            return 0
+        with self._lock, self._conn:
+            cur = self._conn.execute(f"DELETE FROM {TABLE_NAME} WHERE stored_at < ?",
+                                     (time.time() - self.ttl,))
+        return cur.rowcount
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
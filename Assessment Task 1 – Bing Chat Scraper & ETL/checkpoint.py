@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Resumable crawl checkpoints with query-level dedup.
+
+Every query is keyed by a hash of its normalized text plus the target it was
+sent to, and its state is kept in a small SQLite table:
+
+    pending -> done     (record persisted by the load stage)
+    pending -> failed   (run ended without a persisted record)
+
+On restart, plan() drops queries that are already done, so only failed (or
+never attempted) queries are scraped again.
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import Iterable, List
+
+# ---------------- Configuration ----------------
+TABLE_NAME = "checkpoints"
+# ------------------------------------------------
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+def query_key(query: str, target: str) -> str:
+    return hashlib.sha1(f"{target}\x1f{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+def dedup_queries(queries: Iterable[str]) -> List[str]:
+    """Drop repeats (after normalization), keeping the first occurrence in order."""
+    seen = set()
+    unique = []
+    for q in queries:
+        n = normalize_query(q)
+        if n and n not in seen:
+            seen.add(n)
+            unique.append(q)
+    return unique
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+class CheckpointStore:
+    def __init__(self, path: str, target: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.target = target
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+                    key TEXT PRIMARY KEY,
+                    target TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_utc TEXT NOT NULL
+                )""")
+
+    def plan(self, queries: Iterable[str]) -> List[str]:
+        """
+        Dedup `queries`, skip the ones already done for this target, and mark
+        the rest pending (bumping their attempt count). Returns what to scrape.
+        """
+        todo = []
+        with self._lock, self._conn:
+            for q in dedup_queries(queries):
+                key = query_key(q, self.target)
+                row = self._conn.execute(f"SELECT status FROM {TABLE_NAME} WHERE key = ?",
+                                         (key,)).fetchone()
+                if row and row[0] == "done":
+                    continue
+                self._conn.execute(
+                    f"""INSERT INTO {TABLE_NAME} (key, target, query, status, attempts, updated_utc)
+                        VALUES (?, ?, ?, 'pending', 1, ?)
+                        ON CONFLICT(key) DO UPDATE SET status = 'pending',
+                            attempts = attempts + 1, updated_utc = excluded.updated_utc""",
+                    (key, self.target, q, _now()))
+                todo.append(q)
+        return todo
+
+    def mark_done(self, queries: Iterable[str]):
+        """Call once the records for `queries` have been persisted."""
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"UPDATE {TABLE_NAME} SET status = 'done', updated_utc = ? WHERE key = ?",
+                [(now, query_key(q, self.target)) for q in queries])
+
+    def fail_pending(self) -> int:
+        """End of run: anything still pending did not produce a record."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"UPDATE {TABLE_NAME} SET status = 'failed', updated_utc = ? "
+                f"WHERE target = ? AND status = 'pending'", (_now(), self.target))
+        return cur.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT status, COUNT(*) FROM {TABLE_NAME} "
+                                      f"WHERE target = ? GROUP BY status", (self.target,))
+            return dict(rows.fetchall())
+
+    def close(self):
+        self._conn.close()
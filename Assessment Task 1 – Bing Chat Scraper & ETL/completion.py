@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Response completion detection for chat scrapers.
+
+Instead of sleeping a fixed amount after pressing Enter, the scrapers poll one
+or more strategies until the answer is actually finished:
+
+- DomStability:      the watched text stopped changing for `quiet_ms`
+- SendButtonEnabled: the send button is enabled again (app.py disables
+                     #send-btn while /api/chat is in flight)
+- NetworkIdle:       no open requests in the Chrome DevTools performance log
+                     for `idle_ms` (needs the "goog:loggingPrefs" capability,
+                     see enable_performance_log)
+
+Call prepare_strategies() right before submitting the query and
+wait_for_completion() right after; the latter returns a per-strategy latency
+breakdown in seconds.
+Strategies are only polled once the optional `gate` (e.g. "a bot message is
+on the page") holds, so they judge whether an answer that exists is finished.
+"""
+
+import json
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import WebDriverException
+
+# ---------------- Configuration ----------------
+POLL_INTERVAL = 0.05              # seconds between completion checks
+DEFAULT_QUIET_MS = 300            # DomStability: unchanged text for this long
+DEFAULT_IDLE_MS = 200             # NetworkIdle: no network activity for this long
+# ------------------------------------------------
+
+LAST_MESSAGE_JS = """
+const box = document.querySelector("[data-testid='chat-messages']");
+const last = box && box.lastElementChild;
+return last ? last.textContent : '';
+"""
+
+def enable_performance_log(opts):
+    """Turn on the DevTools performance log that NetworkIdle reads."""
+    opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+class CompletionStrategy:
+    name = "base"
+
+    def prepare(self, driver):
+        """Called right before the query is submitted."""
+
+    def start(self, driver):
+        """Called right after the query is submitted."""
+
+    def is_complete(self, driver) -> bool:
+        raise NotImplementedError
+
+class DomStability(CompletionStrategy):
+    """Complete once the text returned by `script` changed and then stayed unchanged for `quiet_ms`."""
+    name = "dom"
+
+    def __init__(self, script: str = LAST_MESSAGE_JS, quiet_ms: int = DEFAULT_QUIET_MS,
+                 require_change: bool = True):
+        self.script = script
+        self.quiet = quiet_ms / 1000.0
+        self.require_change = require_change
+        self._baseline = None
+        self._last = None
+        self._changed_at = 0.0
+
+    def start(self, driver):
+        self._baseline = self._last = driver.execute_script(self.script)
+        self._changed_at = time.perf_counter()
+
+    def is_complete(self, driver) -> bool:
+        text = driver.execute_script(self.script)
+        now = time.perf_counter()
+        if text != self._last:
+            self._last = text
+            self._changed_at = now
+            return False
+        if self.require_change and text == self._baseline:
+            return False
+        return bool(text) and now - self._changed_at >= self.quiet
+
+class SendButtonEnabled(CompletionStrategy):
+    """Complete once the send button is enabled again."""
+    name = "send_btn"
+
+    def __init__(self, selector: str = "[data-testid='send-btn']"):
+        self.script = f'const b = document.querySelector("{selector}"); return !!b && !b.disabled;'
+
+    def is_complete(self, driver) -> bool:
+        return bool(driver.execute_script(self.script))
+
+class NetworkIdle(CompletionStrategy):
+    """Complete once every request seen since prepare() finished and the network was quiet for `idle_ms`."""
+    name = "network"
+
+    def __init__(self, idle_ms: int = DEFAULT_IDLE_MS):
+        self.idle = idle_ms / 1000.0
+        self._inflight = set()
+        self._last_event = 0.0
+        self._available = True
+
+    def _drain(self, driver) -> List[Dict]:
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            if self._available:
+                print("  ! Performance log unavailable; network-idle detection disabled")
+            self._available = False
+            return []
+        return [json.loads(e["message"])["message"] for e in entries]
+
+    def prepare(self, driver):
+        self._drain(driver)   # discard events from before the query
+        self._inflight.clear()
+
+    def start(self, driver):
+        # The query's own request is already in the log: read it in is_complete()
+        self._last_event = time.perf_counter()
+
+    def is_complete(self, driver) -> bool:
+        for msg in self._drain(driver):
+            method = msg.get("method", "")
+            req_id = msg.get("params", {}).get("requestId")
+            if method == "Network.requestWillBeSent":
+                self._inflight.add(req_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                self._inflight.discard(req_id)
+            elif method not in ("Network.responseReceived", "Network.dataReceived"):
+                continue      # a streamed body arrives as dataReceived events
+            self._last_event = time.perf_counter()
+        if not self._available:
+            return True
+        return not self._inflight and time.perf_counter() - self._last_event >= self.idle
+
+def prepare_strategies(driver, strategies: Sequence[CompletionStrategy]):
+    """Call right before submitting the query."""
+    for s in strategies:
+        s.prepare(driver)
+
+STRATEGIES = {
+    DomStability.name: DomStability,
+    SendButtonEnabled.name: SendButtonEnabled,
+    NetworkIdle.name: NetworkIdle,
+}
+
+def build_strategies(names: Sequence[str]) -> List[CompletionStrategy]:
+    """Instantiate strategies by name, e.g. build_strategies(["send_btn", "dom"])."""
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown completion strategy: {', '.join(unknown)} "
+                         f"(choose from {', '.join(STRATEGIES)})")
+    return [STRATEGIES[n]() for n in names]
+
+def wait_for_completion(driver, strategies: Sequence[CompletionStrategy], timeout: float,
+                        gate: Optional[Callable] = None, require_all: bool = True,
+                        started: Optional[float] = None) -> Dict[str, float]:
+    """
+    Poll `strategies` until all (or any, with require_all=False) report completion.
+
+    Call it right after submitting the query. Returns seconds from `started`
+    (default: now) until `gate` first held ("first_response_s") and until each
+    strategy first completed ("<name>_s"), plus "complete_s" for the overall
+    result. Raises selenium's TimeoutException after `timeout` seconds.
+    """
+    started = time.perf_counter() if started is None else started
+    for s in strategies:
+        s.start(driver)
+    done: Dict[str, float] = {}
+
+    def finished(drv):
+        if gate is not None and "first_response" not in done:
+            if not gate(drv):
+                return False
+            done["first_response"] = time.perf_counter() - started
+        for s in strategies:
+            if s.name not in done and s.is_complete(drv):
+                done[s.name] = time.perf_counter() - started
+        hits = sum(1 for s in strategies if s.name in done)
+        return hits == len(strategies) if require_all or not strategies else hits > 0
+
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(finished)
+    breakdown = {f"{name}_s": round(t, 4) for name, t in done.items()}
+    breakdown["complete_s"] = round(time.perf_counter() - started, 4)
+    return breakdown
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Conversation sessions for the browser scrapers.
+
+Queries are sent as turns of a conversation. After `max_turns` turns the
+scraper opens a new chat, so neither the page's DOM nor the target's
+conversation context grows without bound and a query costs the same on the
+5,000th query as on the first. A page reload or browser restart (by the retry
+layer or the driver pool) also starts a new conversation, since the old
+context is gone.
+
+Every record carries the conversation it was sent in and its turn there:
+
+    conversation_id   uuid4 hex, one per chat thread
+    turn_id           1-based position of the query within that conversation
+"""
+
+import uuid
+from typing import Tuple
+
+# ---------------- Configuration ----------------
+CONVERSATION_TURNS = 20           # turns before a new chat is opened (0: never)
+# ------------------------------------------------
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
+
+class Conversation:
+    """Turn counter of the chat thread a session is currently writing to."""
+
+    def __init__(self, max_turns: int = CONVERSATION_TURNS):
+        self.max_turns = max_turns
+        self.started = 0              # conversations begun by this session
+        self.restart()
+
+    def restart(self):
+        """The chat context was reset (new chat, reload, restart): begin a new conversation."""
+        self.id = new_conversation_id()
+        self.turns = 0
+        self.started += 1
+
+    @property
+    def full(self) -> bool:
+        return bool(self.max_turns) and self.turns >= self.max_turns
+
+    def next_turn(self) -> Tuple[str, int]:
+        """(conversation_id, turn_id) for the message about to be sent."""
+        self.turns += 1
+        return self.id, self.turns
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Browser lifecycle: cached chromedriver, warm pool, cookies, recycling.
+
+- resolve_driver_path() runs ChromeDriverManager().install() at most once per
+  process and remembers the result on disk, so later runs skip the lookup.
+- DriverPool launches `size` browsers in parallel up front (each with its own
+  persistent --user-data-dir profile) and runs `on_ready` (e.g. open_chat) on
+  them before the first query is sent.
+- A pooled browser is replaced after `max_queries` queries or when it and its
+  renderer processes use more than `max_rss_mb`.
+- save_cookies()/load_cookies() persist a session so a login can be skipped.
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import psutil
+from webdriver_manager.chrome import ChromeDriverManager
+
+# ---------------- Configuration ----------------
+DRIVER_PATH_CACHE = os.path.join("scraped_data", "chromedriver_path.json")
+PROFILE_ROOT = os.path.join("scraped_data", "profiles")    # one user-data-dir per pool slot
+RECYCLE_AFTER = 200               # queries per browser before it is replaced
+RECYCLE_RSS_MB = 1500             # replace a browser whose processes exceed this (MB)
+# ------------------------------------------------
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path(cache_file: str = DRIVER_PATH_CACHE) -> str:
+    """chromedriver path: from memory, from `cache_file` if still present, else ChromeDriverManager."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                path = json.load(f).get("path")
+        except (OSError, ValueError):
+            path = None
+        if not (path and os.path.exists(path)):
+            path = ChromeDriverManager().install()
+            os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"path": path}, f)
+        _driver_path = path
+        return path
+
+def save_cookies(driver, path: str) -> int:
+    cookies = driver.get_cookies()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cookies, f)
+    return len(cookies)
+
+def load_cookies(driver, path: str, url: str) -> int:
+    """
+    Restore cookies saved by save_cookies(). The browser has to be on the
+    cookies' domain first, so this opens `url`, adds them and reloads.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        cookies = json.load(f)
+    driver.get(url)
+    added = 0
+    for cookie in cookies:
+        if cookie.get("sameSite") not in ("Strict", "Lax", "None"):
+            cookie.pop("sameSite", None)   # Chrome rejects other values
+        try:
+            driver.add_cookie(cookie)
+            added += 1
+        except Exception:   # expired or for another domain
+            continue
+    driver.refresh()
+    return added
+
+def browser_rss_mb(driver) -> float:
+    """Resident memory of chromedriver plus every Chrome process under it."""
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        procs = [root] + root.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return 0.0
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 2**20
+
+class PooledDriver:
+    """A pool slot: the live driver plus how many queries it has served."""
+
+    def __init__(self, slot: int, profile_dir: Optional[str]):
+        self.slot = slot
+        self.profile_dir = profile_dir
+        self.driver = None
+        self.queries = 0
+
+class DriverPool:
+    def __init__(self, factory: Callable[[Optional[str]], object], size: int = 1,
+                 on_ready: Optional[Callable[[object], None]] = None,
+                 profile_root: Optional[str] = PROFILE_ROOT,
+                 max_queries: int = RECYCLE_AFTER, max_rss_mb: float = RECYCLE_RSS_MB):
+        """
+        `factory(profile_dir)` launches one browser; `profile_dir` is None when
+        `profile_root` is None (throwaway profiles).
+        """
+        self.factory = factory
+        self.on_ready = on_ready
+        self.max_queries = max_queries
+        self.max_rss_mb = max_rss_mb
+        self.recycled = 0
+        self._slots = [PooledDriver(i, os.path.join(profile_root, f"slot-{i}") if profile_root else None)
+                       for i in range(size)]
+        self._idle: List[PooledDriver] = []
+        self._cond = threading.Condition()
+
+    def _launch(self, slot: PooledDriver) -> PooledDriver:
+        if slot.profile_dir:
+            os.makedirs(slot.profile_dir, exist_ok=True)
+        driver = self.factory(slot.profile_dir)
+        try:
+            if self.on_ready:
+                self.on_ready(driver)
+        except Exception:
+            driver.quit()
+            raise
+        slot.driver, slot.queries = driver, 0
+        return slot
+
+    def start(self) -> int:
+        """Launch every browser in parallel; returns how many came up."""
+        ready = 0
+        with ThreadPoolExecutor(max_workers=len(self._slots)) as pool:
+            futures = {pool.submit(self._launch, s): s for s in self._slots}
+            for future, slot in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[pool] ! Slot {slot.slot} failed to start: {e}")
+                    continue
+                ready += 1
+                with self._cond:
+                    self._idle.append(slot)
+                    self._cond.notify()
+        return ready
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[PooledDriver]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._idle, timeout=timeout):
+                return None
+            return self._idle.pop()
+
+    def release(self, slot: PooledDriver):
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    def needs_recycle(self, slot: PooledDriver) -> bool:
+        if slot.queries >= self.max_queries:
+            return True
+        return bool(self.max_rss_mb) and browser_rss_mb(slot.driver) > self.max_rss_mb
+
+    def recycle(self, slot: PooledDriver, reason: Optional[str] = None) -> PooledDriver:
+        """Quit the slot's browser and launch a fresh one (same profile)."""
+        reason = reason or (f"{slot.queries} queries" if slot.queries >= self.max_queries
+                            else f"{browser_rss_mb(slot.driver):.0f} MB")
+        print(f"[pool] Recycling browser {slot.slot} ({reason})")
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+        self.recycled += 1
+        return self._launch(slot)
+
+    def after_query(self, slot: PooledDriver) -> bool:
+        """Count a query on `slot`; recycle it if due. True when the browser was replaced."""
+        slot.queries += 1
+        if self.needs_recycle(slot):
+            self.recycle(slot)
+            return True
+        return False
+
+    def stats(self) -> Dict:
+        return {"size": len(self._slots), "recycled": self.recycled}
+
+    def close(self):
+        for slot in self._slots:
+            if slot.driver is not None:
+                try:
+                    slot.driver.quit()
+                except Exception:
+                    pass
+                slot.driver = None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Response extraction strategies, one per target site.
+
+A strategy names the chat container(s) to scope the parse to and an ordered
+list of selectors for the answer element. Selectors are written as XPath and
+compiled once with lxml, so no cssselect dependency is needed and nothing is
+re-parsed per query. Only the container's outerHTML is fetched from the
+browser and parsed (lxml.html, not html.parser), which keeps both the
+WebDriver transfer and the parse small on long pages.
+
+The strategy remembers which selector produced the last answer and tries it
+first next time.
+
+    strategy = for_url("https://bing.com/chat")
+    result = strategy.extract(driver)
+    result.text, result.selector, result.root
+"""
+
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from lxml import etree, html
+
+# Returns the outerHTML of the first container selector that matches, else of <body>
+CONTAINER_HTML_JS = """
+for (const sel of arguments[0]) {
+  const el = document.querySelector(sel);
+  if (el) return el.outerHTML;
+}
+return document.body ? document.body.outerHTML : '';
+"""
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+class Extraction(NamedTuple):
+    text: str
+    selector: Optional[str]        # label of the selector that matched, None if none did
+    root: Optional[html.HtmlElement]
+
+def element_text(el) -> str:
+    """Whitespace-normalized text of an element (like get_text(" ", strip=True))."""
+    return " ".join(t.strip() for t in el.itertext() if t.strip())
+
+class ExtractionStrategy:
+    def __init__(self, name: str, selectors: Sequence[Tuple[str, str]],
+                 containers: Sequence[str] = (), min_length: int = 20):
+        """
+        `selectors` are (label, xpath) pairs evaluated against the container;
+        `containers` are CSS selectors tried in order in the browser.
+        """
+        self.name = name
+        self.containers = list(containers)
+        self.min_length = min_length
+        self._selectors = [(label, etree.XPath(xpath)) for label, xpath in selectors]
+        self._order = list(range(len(self._selectors)))
+        self._lock = threading.Lock()
+
+    def _promote(self, i: int):
+        with self._lock:
+            if self._order[0] != i:
+                self._order.remove(i)
+                self._order.insert(0, i)
+
+    @property
+    def order(self) -> List[str]:
+        return [self._selectors[i][0] for i in self._order]
+
+    def parse(self, markup: str) -> Optional[html.HtmlElement]:
+        if not markup or not markup.strip():
+            return None
+        try:
+            return html.fromstring(markup)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def extract_html(self, markup: str) -> Extraction:
+        """Run the selectors over `markup`; the last match of a selector is the newest answer."""
+        root = self.parse(markup)
+        if root is None:
+            return Extraction("", None, None)
+        text = ""
+        with self._lock:
+            order = list(self._order)
+        for i in order:
+            label, xpath = self._selectors[i]
+            matches = xpath(root)
+            if not matches:
+                continue
+            text = element_text(matches[-1])
+            if len(text) > self.min_length:
+                self._promote(i)
+                return Extraction(text, label, root)
+        return Extraction(text, None, root)
+
+    def extract(self, driver) -> Extraction:
+        markup = driver.execute_script(CONTAINER_HTML_JS, self.containers) or ""
+        return self.extract_html(markup)
+
+REGISTRY: Dict[str, ExtractionStrategy] = {}
+HOSTS: Dict[str, str] = {}        # host -> strategy name
+
+def register(strategy: ExtractionStrategy, hosts: Sequence[str] = ()) -> ExtractionStrategy:
+    REGISTRY[strategy.name] = strategy
+    for host in hosts:
+        HOSTS[host] = strategy.name
+    return strategy
+
+def for_url(url: str, default: str = "generic") -> ExtractionStrategy:
+    return REGISTRY[HOSTS.get(urlparse(url).hostname or url, default)]
+
+# The selector list SimpleBingChatScraper used to try, in the same order
+GENERIC_SELECTORS = [
+    ("data-testid", "//*[@data-testid='chat-message-content']"),
+    (".chat-message-content", f"//*[{_has_class('chat-message-content')}]"),
+    (".response-content", f"//*[{_has_class('response-content')}]"),
+    ("[class*=message]", "//*[contains(@class, 'message')]"),
+    ("[class*=response]", "//*[contains(@class, 'response')]"),
+]
+
+register(ExtractionStrategy("generic", GENERIC_SELECTORS))
+register(ExtractionStrategy("bing", GENERIC_SELECTORS,
+                            containers=["#b_sydConvCont", "cib-serp", "main"]),
+         hosts=["bing.com", "www.bing.com", "copilot.microsoft.com"])
+register(ExtractionStrategy("local-echo", [
+    ("bot content", f"//*[{_has_class('bot')}]//*[@data-testid='chat-message-content']"),
+], containers=["[data-testid='chat-messages']"], min_length=0),
+    hosts=["127.0.0.1", "localhost"])
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+HTTP-direct extraction backend for the local chat demo.
+
+When the target exposes a JSON endpoint (app.py's POST /api/chat) there is no
+need to drive a browser: queries are posted straight to the API over a pooled
+keep-alive requests.Session, with a bounded number of requests in flight.
+Records have the same shape as local_chat_scraper.send_query_and_capture(),
+so transform() and load_outputs() work unchanged.
+"""
+
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import span
+from rate_limit import AdaptiveRateLimiter
+
+# ---------------- Configuration ----------------
+API_URL = "http://127.0.0.1:5000/api/chat"
+HTTP_CONCURRENCY = 8              # max requests in flight
+HTTP_TIMEOUT = 10                 # per-request timeout (seconds)
+USER_AGENT = "LocalSeleniumDemo/1.0 (+https://example.local)"
+HTTP_RATE = 50                    # initial requests/s; adapts with AIMD up to HTTP_MAX_RATE
+HTTP_MAX_RATE = 1000
+HTTP_RATE_STEP = 5                # additive increase per fast response
+HTTP_BACKOFF_S = 0.25             # first backoff after a timeout/429/5xx; doubles per repeat
+# ------------------------------------------------
+
+def make_session(pool_size: int = HTTP_CONCURRENCY) -> requests.Session:
+    """Keep-alive session whose connection pool matches the concurrency limit."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+def send_query_http(session: requests.Session, query: str, api_url: str = API_URL,
+                    timeout: float = HTTP_TIMEOUT) -> Dict:
+    t0 = time.perf_counter()
+    with span("request", source="http"):
+        resp = session.post(api_url, json={"query": query}, timeout=timeout)
+        resp.raise_for_status()
+    t_received = time.perf_counter()
+    with span("parse", source="http"):
+        response = (resp.json().get("response") or "").strip()
+    t_parsed = time.perf_counter()
+
+    ts = datetime.utcnow().isoformat() + "Z"
+    return {
+        "query": query,
+        "response": response,
+        "timestamp_utc": ts,
+        "response_len": len(response),
+        "latency_complete_s": round(t_parsed - t0, 4),
+        "parse_s": round(t_parsed - t_received, 6)
+    }
+
+def make_http_limiter(concurrency: int = HTTP_CONCURRENCY) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(rate=HTTP_RATE, max_rate=HTTP_MAX_RATE, increase=HTTP_RATE_STEP,
+                               target_latency_s=HTTP_TIMEOUT / 2, max_concurrency=concurrency,
+                               backoff_base_s=HTTP_BACKOFF_S)
+
+def _overloaded(e: requests.RequestException) -> bool:
+    """Errors that mean "slow down": timeouts, refused connections, 429 and 5xx."""
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return True
+    status = e.response.status_code if e.response is not None else None
+    return status == 429 or (status is not None and status >= 500)
+
+def fetch_record(session: requests.Session, limiter: AdaptiveRateLimiter, query: str,
+                 api_url: str = API_URL) -> Dict:
+    """send_query_http() paced by `limiter`, reporting latency or overload back to it."""
+    with limiter.slot(api_url) as ticket:
+        try:
+            record = send_query_http(session, query, api_url=api_url)
+        except requests.RequestException as e:
+            if _overloaded(e):
+                ticket.timeout()
+            raise
+        ticket.ok(record["latency_complete_s"])
+    return record
+
+def http_extractor(session: requests.Session, limiter: AdaptiveRateLimiter,
+                   api_url: str = API_URL) -> Callable[[str], Optional[Dict]]:
+    """Blocking query -> record callable for pipeline.AsyncPipeline (None when the request failed)."""
+    def extract(q: str) -> Optional[Dict]:
+        try:
+            record = fetch_record(session, limiter, q, api_url)
+        except (requests.RequestException, ValueError) as e:
+            print(f"! {q}: {e}")
+            return None
+        print(f"✓ {q} ({record['response_len']} chars)")
+        return record
+    return extract
+
+def scrape_http(queries: List[str], concurrency: int = HTTP_CONCURRENCY, api_url: str = API_URL,
+                on_record: Optional[Callable[[Dict], None]] = None,
+                limiter: Optional[AdaptiveRateLimiter] = None) -> List[Dict]:
+    """
+    Post all queries with at most `concurrency` in flight; records keep query order.
+
+    Sends are paced by `limiter` (an adaptive one for `api_url` by default):
+    fast responses raise the rate, slow ones, timeouts and 429/5xx lower it
+    and make every thread back off.
+
+    With `on_record`, each record is handed over as soon as it arrives and
+    nothing is kept in memory (the returned list is empty).
+    """
+    session = make_session(pool_size=concurrency)
+    limiter = limiter or make_http_limiter(concurrency)
+    results: List[Optional[Dict]] = [None] * len(queries) if on_record is None else []
+
+    def fetch(idx: int):
+        q = queries[idx]
+        try:
+            record = fetch_record(session, limiter, q, api_url)
+            if on_record is None:
+                results[idx] = record
+            else:
+                on_record(record)
+            print(f"[{idx + 1}/{len(queries)}] ✓ {q} ({record['response_len']} chars)")
+        except (requests.RequestException, ValueError) as e:
+            print(f"[{idx + 1}/{len(queries)}] ! {q}: {e}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fetch, range(len(queries))))
+    finally:
+        session.close()
+    return [r for r in results if r is not None]
@@ -1,24 +1,29 @@
 #!/usr/bin/env python3
 """
-Local Chat Scraper & ETL (Selenium + BeautifulSoup + CSV + SQLite)
+Local Chat Scraper & ETL (Selenium + CSV + SQLite)
 
 Demonstrates:
 - Simulating user interactions with a chat UI (type, click/Enter)
-- Extracting generated responses via HTML parsing
+- Extracting generated responses incrementally from the live DOM
 - Rate limiting between messages
-- ETL: Transform and load data to CSV and SQLite
+- Retries with page reload / browser restart; failed queries go to a dead-letter file
+- Conversations of N turns: a new chat is opened every N queries, and each
+  record carries its conversation_id and turn_id
+- ETL: Transform and load data to CSV and SQLite (phased, streamed, or as an
+  asyncio pipeline that overlaps transform/load with extraction)
 """
 
 import os
 import time
+import re
 import json
-import random
+import queue
+import argparse
+import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Sequence
 
 import pandas as pd
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -27,35 +32,77 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service as ChromeService
 
+from http_engine import scrape_http, http_extractor, make_session, make_http_limiter, HTTP_CONCURRENCY
+from sqlite_loader import SqliteLoader
+from parquet_sink import ParquetSink, write_parquet
+from sinks import StreamingLoader, JsonlSink, CsvSink, SqliteSink, BATCH_SIZE
+from pipeline import AsyncPipeline
+from cache import ResponseCache
+from checkpoint import CheckpointStore, dedup_queries
+from completion import build_strategies, enable_performance_log, prepare_strategies, wait_for_completion, STRATEGIES
+from browser_profile import apply_lean_options, block_resources
+from driver_pool import DriverPool, PooledDriver, resolve_driver_path, PROFILE_ROOT, RECYCLE_AFTER, RECYCLE_RSS_MB
+from rate_limit import AdaptiveRateLimiter
+from typing_engine import TypingEngine, MODES as TYPING_MODES, mode_for
+from conversation import Conversation, CONVERSATION_TURNS
+from resilience import ChatBackendError, DeadLetterQueue, RetryPolicy, SessionFailed, RELOAD, MAX_ATTEMPTS, describe
+from metrics import span, timed, write_metrics, configure_timing_log, summary
+
 # ---------------- Configuration ----------------
 BASE_URL = "http://127.0.0.1:5000/chat"
+API_URL = "http://127.0.0.1:5000/api/chat"   # JSON endpoint used by --mode http
 OUTPUT_DIR = "scraped_data"
 CSV_PATH = os.path.join(OUTPUT_DIR, "chat_responses.csv")
 DB_PATH = os.path.join(OUTPUT_DIR, "chat_responses.db")
+JSONL_PATH = os.path.join(OUTPUT_DIR, "chat_responses.jsonl")   # --stream raw records
+CHECKPOINT_PATH = os.path.join(OUTPUT_DIR, "checkpoints.db")    # --resume state
+CACHE_PATH = os.path.join(OUTPUT_DIR, "response_cache.db")      # cached responses (TTL + LRU)
+PARQUET_DIR = os.path.join(OUTPUT_DIR, "parquet")               # partitioned by target/date
+DEAD_LETTER_PATH = os.path.join(OUTPUT_DIR, "dead_letters.jsonl")   # queries that kept failing
 TABLE_NAME = "chat_messages"
 HEADLESS = False                  # set True for headless runs
-MIN_DELAY, MAX_DELAY = 0.25, 0.5   # human-like delays between keystrokes
-MIN_GAP, MAX_GAP = 3, 4       # rate limit between queries
+LEAN_BROWSER = False              # lean Chrome profile: eager loads, no images/fonts/CSS
+TYPING_MODE = mode_for(BASE_URL)  # instant, js, chunked or human (see typing_engine)
+TYPING_WPM = 30                   # speed of the human typing model
+RATE = 0.3                        # initial queries/s to the chat page; adapts with AIMD
+MIN_RATE, MAX_RATE = 0.05, 2.0    # bounds for the adaptive rate
 WAIT_TIMEOUT = 10                 # explicit wait timeout
+WORKERS = 1                       # parallel browser sessions (1 = sequential)
+COMPLETION = ["send_btn"]         # completion strategies: send_btn, dom, network
+BACKEND_ERROR_PREFIX = "Error:"   # app.py shows a failed /api/chat request as a bot message starting with this
 # ------------------------------------------------
 
-def polite_sleep(a, b):
-    time.sleep(random.uniform(a, b))
+def make_limiter(max_concurrency: int = WORKERS) -> AdaptiveRateLimiter:
+    """Rate limiter for BASE_URL; latencies above WAIT_TIMEOUT/2 count as slow."""
+    return AdaptiveRateLimiter(rate=RATE, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                               target_latency_s=WAIT_TIMEOUT / 2, max_concurrency=max_concurrency)
 
-def setup_driver(headless: bool = HEADLESS):
+def setup_driver(headless: bool = HEADLESS, driver_path: Optional[str] = None,
+                 perf_log: bool = False, profile_dir: Optional[str] = None, lean: bool = LEAN_BROWSER):
     opts = Options()
     if headless:
         # Using new headless flag for modern Chrome
         opts.add_argument("--headless=new")
-    opts.add_argument("--window-size=1200,800")
+    if lean:
+        apply_lean_options(opts)
+    else:
+        opts.add_argument("--window-size=1200,800")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--no-sandbox")
     # Honest UA string (do not pretend to be something you’re not)
     opts.add_argument("user-agent=LocalSeleniumDemo/1.0 (+https://example.local)")
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=opts)
+    if profile_dir:
+        # Persistent profile: HTTP cache, cookies and local storage survive restarts
+        opts.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if perf_log:
+        # DevTools performance log, read by the "network" completion strategy
+        enable_performance_log(opts)
+    driver_path = driver_path or resolve_driver_path()
+    driver = webdriver.Chrome(service=ChromeService(driver_path), options=opts)
+    if lean:
+        block_resources(driver)
     return driver
 
 def open_chat(driver):
@@ -68,119 +115,622 @@ def open_chat(driver):
         EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='send-btn']"))
     )
 
-def type_humanlike(element, text: str):
-    for ch in text:
-        element.send_keys(ch)
-        polite_sleep(MIN_DELAY, MAX_DELAY)
+def make_typing(mode: Optional[str] = None) -> TypingEngine:
+    return TypingEngine(mode or TYPING_MODE, wpm=TYPING_WPM)
+
+def make_retry(max_attempts: int = MAX_ATTEMPTS, dead_letter_path: Optional[str] = None) -> RetryPolicy:
+    """`dead_letter_path` defaults to DEAD_LETTER_PATH at call time; "" keeps no dead letters."""
+    path = DEAD_LETTER_PATH if dead_letter_path is None else dead_letter_path
+    dead_letters = DeadLetterQueue(path, target=BASE_URL) if path else None
+    return RetryPolicy(dead_letters, max_attempts=max_attempts)
+
+# Returns only the messages at index >= arguments[0] of the chat container, so each
+# poll costs O(new messages) instead of re-serialising and re-parsing the whole page.
+NEW_MESSAGES_JS = """
+const box = document.querySelector("[data-testid='chat-messages']");
+if (!box) return [];
+const nodes = box.children;
+const out = [];
+for (let i = arguments[0]; i < nodes.length; i++) {
+  const content = nodes[i].querySelector("[data-testid='chat-message-content']");
+  out.push({
+    index: i,
+    role: nodes[i].classList.contains('bot') ? 'bot' : 'user',
+    text: content ? content.textContent.trim() : ''
+  });
+}
+return out;
+"""
+
+class MessageTracker:
+    """
+    Remembers how many chat messages were already read from a page.
+
+    The newest message is re-read on the next poll, because a streamed answer
+    keeps growing after its node first appears.
+    """
+
+    def __init__(self, seen: int = 0):
+        self.seen = seen
+        self.count = seen             # messages on the page as of the last poll
+
+    def poll(self, driver) -> List[Dict]:
+        msgs = driver.execute_script(NEW_MESSAGES_JS, self.seen) or []
+        if msgs:
+            self.seen = msgs[-1]["index"]
+            self.count = self.seen + 1
+        return msgs
+
+    @classmethod
+    def at_end(cls, driver) -> "MessageTracker":
+        """Tracker positioned at the last message currently on the page."""
+        tracker = cls()
+        tracker.poll(driver)
+        return tracker
 
-def send_query_and_capture(driver, query: str) -> Dict:
+def pair_turn(msgs: List[Dict], start: int):
+    """
+    (user, bot) texts of the turn sent when the page held `start` messages: the
+    first user message at index >= start and the first non-empty bot reply after
+    it. Replies to earlier (timed-out) queries sit before `start` and are skipped.
+    """
+    user = None
+    for m in msgs:
+        if m["index"] < start:
+            continue
+        if user is None:
+            if m["role"] == "user":
+                user = m["text"]
+        elif m["role"] == "user":
+            break
+        elif m["text"]:
+            return user, m["text"]
+    return user, None
+
+def send_query_and_capture(driver, query: str, tracker: Optional[MessageTracker] = None,
+                           completion: Optional[List[str]] = None,
+                           typing: Optional[TypingEngine] = None) -> Dict:
+    if tracker is None:
+        tracker = MessageTracker.at_end(driver)
+    typing = typing or make_typing()
+    strategies = build_strategies(COMPLETION if completion is None else completion)
+
+    t0 = time.perf_counter()
+    start = tracker.count             # our user message is the first one at or after this index
     # Locate input and send message (press Enter)
-    textarea = WebDriverWait(driver, WAIT_TIMEOUT).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-testid='chat-input']"))
-    )
-    textarea.clear()
-    type_humanlike(textarea, query)
-    textarea.send_keys(Keys.ENTER)
+    with span("type", source="browser"):
+        textarea = WebDriverWait(driver, WAIT_TIMEOUT).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-testid='chat-input']"))
+        )
+        textarea.clear()
+        typing_s = typing.type(driver, textarea, query)
+        prepare_strategies(driver, strategies)
+        textarea.send_keys(Keys.ENTER)
+    t_sent = time.perf_counter()
+
+    # Wait for a new bot message to appear, reading only messages we have not seen yet
+    new_msgs: Dict[int, Dict] = {}
+
+    def read_new(drv) -> List[Dict]:
+        for m in tracker.poll(drv):
+            new_msgs[m["index"]] = m
+        return [new_msgs[i] for i in sorted(new_msgs)]
 
-    # Wait for a new bot message to appear
-    # Strategy: wait until the last chat message has role 'bot' and contains content
     def bot_message_appeared(drv):
-        soup = BeautifulSoup(drv.page_source, "html.parser")
-        msgs = soup.select("[data-testid='chat-message']")
-        if not msgs:
-            return False
-        last = msgs[-1]
-        # heuristics: bot messages have EchoBot in this demo response
-        content = last.select_one("[data-testid='chat-message-content']")
-        if content and "EchoBot" in content.get_text(strip=True):
-            return True
-        return False
-
-    WebDriverWait(driver, WAIT_TIMEOUT).until(bot_message_appeared)
-
-    # Parse DOM for the latest pair (user & bot)
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    all_msgs = soup.select("[data-testid='chat-message']")
-    # Find last two: user then bot
-    # (In this simple app the sequence is guaranteed; in real sites you'd match by timestamps/roles)
-    last_user = None
-    last_bot = None
-
-    # Walk from end backwards to pick the most recent bot and the user before it
-    for node in reversed(all_msgs):
-        text = node.select_one("[data-testid='chat-message-content']")
-        text = text.get_text(strip=True) if text else ""
-        if "EchoBot" in text and last_bot is None:
-            last_bot = text
-        elif last_bot is not None and last_user is None:
-            # previous message should belong to user
-            last_user = text
-            break
+        return pair_turn(read_new(drv), start)[1] is not None
+
+    # ...then until the completion strategies agree the answer is finished
+    with span("wait", source="browser"):
+        latency = wait_for_completion(driver, strategies, WAIT_TIMEOUT,
+                                      gate=bot_message_appeared, started=t_sent)
+
+    # Pair our user message with the reply after it
+    # (re-read once more: a streamed answer may have grown since the gate fired)
+    with span("parse", source="browser"):
+        t_done = time.perf_counter()
+        last_user, last_bot = pair_turn(read_new(driver), start)
+        t_parsed = time.perf_counter()
 
     ts = datetime.utcnow().isoformat() + "Z"
     return {
         "query": last_user or query,
         "response": last_bot or "",
         "timestamp_utc": ts,
-        "response_len": len(last_bot or "")
+        "response_len": len(last_bot or ""),
+        "latency_type_s": round(t_sent - t0, 4),
+        "typing_s": round(typing_s, 4),
+        "latency_first_s": latency["first_response_s"],
+        "latency_complete_s": latency["complete_s"],
+        "parse_s": round(t_parsed - t_done, 6)
     }
 
-def transform(records: List[Dict]) -> pd.DataFrame:
-    df = pd.DataFrame(records)
-    # Example transform: split metadata from EchoBot response
-    # Format: [EchoBot] You said: <query> | length=<n> | time=<iso>
+# Format: [EchoBot] You said: <query> | length=<n> | time=<iso>
+# (greedy query group, so a query that itself contains " | length=" still splits correctly)
+ECHO_RE = re.compile(
+    r"^\[EchoBot\] You said: (?P<echoed_query>.*) \| length=(?P<server_length>\d+) "
+    r"\| time=(?P<server_time>\S+)$",
+    re.DOTALL,
+)
+
+@timed("transform")
+def transform(records) -> pd.DataFrame:
+    """
+    Vectorized transform: split the EchoBot metadata into typed columns and add
+    validation columns. No per-row Python code, so it scales to millions of rows.
+    `records` is a list of record dicts or a DataFrame of them (modified in place).
+    """
+    df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
     df["echo_ok"] = df["response"].str.contains(r"\[EchoBot\]", na=False)
+
+    parts = df["response"].str.extract(ECHO_RE)
+    parsed = parts["server_length"].notna()
+    df["echoed_query"] = parts["echoed_query"]
+    df["server_length"] = pd.to_numeric(parts["server_length"]).astype("Int64")
+    df["server_time"] = pd.to_datetime(parts["server_time"], utc=True, errors="coerce", format="ISO8601")
+
+    # Client capture time minus server response time
+    client_time = pd.to_datetime(df["timestamp_utc"], utc=True, errors="coerce", format="ISO8601")
+    df["latency_ms"] = (client_time - df["server_time"]).dt.total_seconds() * 1000
+
+    # Validation (NA where the response could not be parsed); the server strips the query
+    sent = df["query"].str.strip()
+    df["length_mismatch"] = (df["server_length"] != sent.str.len()).astype("boolean")
+    df["query_mismatch"] = (df["echoed_query"] != sent).astype("boolean")
+    df.loc[~parsed, ["length_mismatch", "query_mismatch"]] = pd.NA
+    if "turn_id" in df:               # browser records only; NA for http/cached-from-http rows
+        df["turn_id"] = pd.to_numeric(df["turn_id"]).astype("Int64")
     return df
 
+@timed("load_outputs")
 def load_outputs(df: pd.DataFrame):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     # CSV
-    df.to_csv(CSV_PATH, index=False, encoding="utf-8")
-    # SQLite
-    engine = create_engine(f"sqlite:///{DB_PATH}")
-    df.to_sql(TABLE_NAME, engine, if_exists="replace", index=False)
+    with span("load", sink="csv"):
+        df.to_csv(CSV_PATH, index=False, encoding="utf-8")
+    # SQLite: upsert into chat_messages, keeping rows from earlier runs
+    with span("load", sink="sqlite"):
+        loader = SqliteLoader(DB_PATH, TABLE_NAME)
+        try:
+            loader.load_dataframe(df)
+        finally:
+            loader.close()
+    # Parquet: one new file per run and partition, for analytics
+    with span("load", sink="parquet"):
+        write_parquet(df, PARQUET_DIR, target=BASE_URL)
 
-def main():
-    queries = [
-        "What is AI?",
-        "Explain supervised vs unsupervised learning.",
-        "Give 3 use cases of Selenium."
-    ]
+def open_stream_loader(batch_size: int = BATCH_SIZE,
+                       on_flush: Optional[Callable[[List[Dict]], None]] = None) -> StreamingLoader:
+    """
+    Streaming load stage: every `batch_size` records the raw dicts are appended
+    to JSONL and the transformed rows to CSV and SQLite (and, in larger files,
+    to Parquet).
+    """
+    return StreamingLoader([CsvSink(CSV_PATH), SqliteSink(DB_PATH, TABLE_NAME),
+                            ParquetSink(PARQUET_DIR, target=BASE_URL)],
+                           raw_sinks=[JsonlSink(JSONL_PATH)],
+                           transform=transform, batch_size=batch_size, on_flush=on_flush)
 
+def open_pipeline(batch_size: int = BATCH_SIZE,
+                  on_record: Optional[Callable[[Dict], None]] = None,
+                  on_flush: Optional[Callable[[List[Dict]], None]] = None) -> AsyncPipeline:
+    """Async extract/transform/load pipeline over the same sinks as open_stream_loader()."""
+    return AsyncPipeline([CsvSink(CSV_PATH), SqliteSink(DB_PATH, TABLE_NAME),
+                          ParquetSink(PARQUET_DIR, target=BASE_URL)],
+                         raw_sinks=[JsonlSink(JSONL_PATH)], transform=transform,
+                         batch_size=batch_size, on_record=on_record, on_flush=on_flush)
+
+def open_pool(size: int, headless: bool = HEADLESS, completion: Optional[List[str]] = None,
+              lean: bool = LEAN_BROWSER, profile_root: Optional[str] = PROFILE_ROOT) -> DriverPool:
+    """Warm pool of `size` browsers, each already on the chat page."""
+    perf_log = "network" in (completion or COMPLETION)
+    # Resolve chromedriver once; concurrent installs race on the same download
+    driver_path = resolve_driver_path()
+    pool = DriverPool(lambda profile: setup_driver(headless=headless, driver_path=driver_path,
+                                                   perf_log=perf_log, profile_dir=profile, lean=lean),
+                      size=size, on_ready=open_chat, profile_root=profile_root,
+                      max_queries=RECYCLE_AFTER, max_rss_mb=RECYCLE_RSS_MB)
+    ready = pool.start()
+    print(f"{ready}/{size} browser(s) ready.")
+    return pool
+
+def _send_limited(limiter: AdaptiveRateLimiter, driver, query: str, tracker: MessageTracker,
+                  completion: Optional[List[str]], typing: Optional[TypingEngine] = None) -> Dict:
+    """send_query_and_capture() paced by `limiter`, reporting latency or timeout back to it."""
+    with limiter.slot(BASE_URL) as ticket:
+        try:
+            record = send_query_and_capture(driver, query, tracker, completion, typing)
+        except TimeoutException:
+            backoff = ticket.timeout()
+            print(f"  ! Backing off {backoff:.1f}s (rate now {limiter.rate(BASE_URL):.2f}/s)")
+            raise
+        if record["response"].startswith(BACKEND_ERROR_PREFIX):
+            ticket.timeout()          # like a 5xx in http mode: the target is struggling
+            raise ChatBackendError(record["response"])
+        ticket.ok(record["latency_complete_s"])
+    return record
+
+class BrowserSession:
+    """
+    One pooled browser, its message tracker and its current conversation, with
+    the recovery actions RetryPolicy asks for.
+    """
+
+    def __init__(self, pool: DriverPool, slot: PooledDriver, limiter: AdaptiveRateLimiter,
+                 retry: RetryPolicy, completion: Optional[List[str]], typing: TypingEngine, prefix: str = "",
+                 turns: int = CONVERSATION_TURNS):
+        self.pool = pool
+        self.slot = slot
+        self.limiter = limiter
+        self.retry = retry
+        self.completion = completion
+        self.typing = typing
+        self.prefix = prefix
+        self.conversation = Conversation(turns)
+        self.tracker = MessageTracker.at_end(slot.driver)
+        self.stopped: Optional[str] = None   # why the next send() raises SessionFailed
+
+    def log(self, msg: str):
+        print(f"{self.prefix}{msg}")
+
+    def _fresh_page(self):
+        """The browser is on a newly loaded chat page: nothing read yet, new conversation."""
+        self.tracker = MessageTracker.at_end(self.slot.driver)
+        self.conversation.restart()
+
+    def new_chat(self):
+        with span("new_chat", source="browser"):
+            open_chat(self.slot.driver)
+        self._fresh_page()
+
+    def recover(self, action: str):
+        if action == RELOAD:
+            open_chat(self.slot.driver)
+        else:
+            self.pool.recycle(self.slot, reason="restart after error")
+        self._fresh_page()
+
+    def _attempt(self, query: str) -> Dict:
+        if self.conversation.full:
+            self.new_chat()
+        # The turn is used up even if the attempt fails: the message may be on the page
+        conversation_id, turn_id = self.conversation.next_turn()
+        record = _send_limited(self.limiter, self.slot.driver, query, self.tracker,
+                               self.completion, self.typing)
+        record["conversation_id"] = conversation_id
+        record["turn_id"] = turn_id
+        return record
+
+    def send(self, query: str) -> Optional[Dict]:
+        """Send `query` with retries; None when it ended in the dead-letter file."""
+        if self.stopped:
+            raise SessionFailed(self.stopped)
+        record = self.retry.run(query, lambda: self._attempt(query), self.recover, log=self.log)
+        # Count the query on the slot; a recycled browser starts on a fresh chat page
+        try:
+            recycled = self.pool.after_query(self.slot)
+        except Exception as e:
+            # The record is good: return it and stop the session before its next query
+            self.stopped = f"browser recycle failed: {describe(e)}"
+            self.log(f"  ! {self.stopped}")
+            return record
+        if recycled:
+            self._fresh_page()
+        return record
+
+def _report_retries(retry: RetryPolicy):
+    stats = retry.stats()
+    if stats:
+        print(f"Retries: {stats}")
+    if retry.dead_letters and retry.dead_letters.count:
+        print(f"  ! {retry.dead_letters.count} queries written to {retry.dead_letters.path}")
+
+def run_worker_pool(queries: List[str], workers: int = WORKERS, headless: bool = HEADLESS,
+                    completion: Optional[List[str]] = None,
+                    on_record: Optional[Callable[[Dict], None]] = None,
+                    lean: bool = LEAN_BROWSER,
+                    limiter: Optional[AdaptiveRateLimiter] = None,
+                    typing_mode: Optional[str] = None,
+                    retry: Optional[RetryPolicy] = None,
+                    turns: int = CONVERSATION_TURNS,
+                    profile_root: Optional[str] = PROFILE_ROOT) -> List[Dict]:
+    """
+    Scrape `queries` with `workers` parallel browser sessions.
+
+    Each worker takes one browser from a warm DriverPool and pulls (index,
+    query) pairs from a shared queue; one AdaptiveRateLimiter paces sends
+    across all sessions and one RetryPolicy retries failed queries. Records
+    are returned in the original query order (dead-lettered queries are
+    dropped), or handed to `on_record` as they complete without being kept.
+    A session whose browser cannot be restarted stops and hands its query
+    back to the queue; the others go on.
+    """
+    jobs: "queue.Queue[tuple]" = queue.Queue()
+    for idx, q in enumerate(queries):
+        jobs.put((idx, q))
+    results: List[Optional[Dict]] = [None] * len(queries) if on_record is None else []
+    limiter = limiter or make_limiter(workers)
+    retry = retry or make_retry()
+    pool = open_pool(workers, headless=headless, completion=completion, lean=lean, profile_root=profile_root)
+
+    def worker(wid: int):
+        slot = pool.acquire(timeout=0)
+        if slot is None:
+            return   # this browser failed to start
+        typing = make_typing(typing_mode)   # one per session: its RNG is not shared
+        job = None
+        try:
+            session = BrowserSession(pool, slot, limiter, retry, completion, typing, prefix=f"[w{wid}] ",
+                                     turns=turns)
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                idx, q = job
+                print(f"[w{wid}] [{idx + 1}/{len(queries)}] Sending: {q}")
+                record = session.send(q)
+                job = None
+                if record is None:
+                    continue
+                if on_record is None:
+                    results[idx] = record
+                else:
+                    on_record(record)
+                print(f"[w{wid}]   ✓ Got response ({record['response_len']} chars, "
+                      f"{record['latency_complete_s']:.2f}s)")
+        except Exception as e:
+            print(f"[w{wid}] ! Session stopped: {e}")
+            if job is not None:   # for a session that is still running
+                jobs.put(job)
+        finally:
+            pool.release(slot)
+
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(1, workers + 1)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        pool.close()
+        _report_retries(retry)
+    if not jobs.empty():
+        print(f"  ! {jobs.qsize()} queries not sent: no browser session was left to take them")
+    return [r for r in results if r is not None]
+
+def scrape_sequential(queries: List[str], headless: bool = HEADLESS,
+                      completion: Optional[List[str]] = None,
+                      on_record: Optional[Callable[[Dict], None]] = None,
+                      lean: bool = LEAN_BROWSER,
+                      limiter: Optional[AdaptiveRateLimiter] = None,
+                      typing_mode: Optional[str] = None,
+                      profile_root: Optional[str] = PROFILE_ROOT,
+                      retry: Optional[RetryPolicy] = None,
+                      turns: int = CONVERSATION_TURNS) -> List[Dict]:
     print("Launching browser…")
-    driver = setup_driver(headless=HEADLESS)
+    limiter = limiter or make_limiter(1)
+    retry = retry or make_retry()
+    typing = make_typing(typing_mode)
+    pool = open_pool(1, headless=headless, completion=completion, lean=lean, profile_root=profile_root)
+    slot = pool.acquire(timeout=0)
     scraped: List[Dict] = []
+    if slot is None:
+        return scraped
     try:
-        open_chat(driver)
+        session = BrowserSession(pool, slot, limiter, retry, completion, typing, turns=turns)
         print("Chat page ready.")
 
         for i, q in enumerate(queries, 1):
             print(f"\n[{i}/{len(queries)}] Sending: {q}")
-            try:
-                record = send_query_and_capture(driver, q)
+            record = session.send(q)
+            if record is None:
+                continue
+            if on_record is None:
                 scraped.append(record)
-                print(f"  ✓ Got response ({record['response_len']} chars)")
-            except TimeoutException:
-                print("  ! Timed out waiting for response")
-            # Rate limit between queries (polite)
-            gap = random.uniform(MIN_GAP, MAX_GAP)
-            print(f"  …sleeping {gap:.1f}s")
-            time.sleep(gap)
-
-        if scraped:
-            df = transform(scraped)
-            load_outputs(df)
-            # Also save raw JSON if desired
-            os.makedirs(OUTPUT_DIR, exist_ok=True)
-            with open(os.path.join(OUTPUT_DIR, "chat_responses.json"), "w", encoding="utf-8") as f:
-                json.dump(scraped, f, ensure_ascii=False, indent=2)
-            print(f"\nSaved:\n  - {CSV_PATH}\n  - {DB_PATH}\n  - {os.path.join(OUTPUT_DIR, 'chat_responses.json')}")
-        else:
-            print("No records scraped.")
-
+            else:
+                on_record(record)
+            print(f"  ✓ Got response ({record['response_len']} chars, "
+                  f"typed {record['typing_s']:.2f}s, first {record['latency_first_s']:.2f}s, "
+                  f"complete {record['latency_complete_s']:.2f}s)")
+    except SessionFailed as e:
+        # Keep what was scraped; the remaining queries stay pending for --resume
+        print(f"  ! Stopping: {e}")
     finally:
-        driver.quit()
+        pool.close()
         print("Browser closed.")
+        _report_retries(retry)
+    return scraped
+
+def scrape_pipeline(queries: List[str], pipeline: AsyncPipeline, mode: str = "browser",
+                    workers: int = WORKERS, concurrency: int = HTTP_CONCURRENCY,
+                    headless: bool = HEADLESS, completion: Optional[List[str]] = None,
+                    lean: bool = LEAN_BROWSER, typing_mode: Optional[str] = None,
+                    retry: Optional[RetryPolicy] = None, ready: Sequence[Dict] = (),
+                    turns: int = CONVERSATION_TURNS, profile_root: Optional[str] = PROFILE_ROOT) -> Dict:
+    """
+    Run `pipeline` with one extract worker per browser session (browser mode)
+    or `concurrency` workers sharing one keep-alive session (http mode).
+    Returns the pipeline's stats.
+    """
+    if mode == "http":
+        session = make_session(pool_size=concurrency)
+        extract = http_extractor(session, make_http_limiter(concurrency), api_url=API_URL)
+        try:
+            return pipeline.run(queries, [extract] * concurrency, ready=ready)
+        finally:
+            session.close()
+
+    limiter = make_limiter(workers)
+    retry = retry or make_retry()
+    pool = open_pool(workers, headless=headless, completion=completion, lean=lean, profile_root=profile_root)
+    sessions = []
+    try:
+        slot = pool.acquire(timeout=0)
+        while slot is not None:
+            sessions.append(BrowserSession(pool, slot, limiter, retry, completion, make_typing(typing_mode),
+                                           prefix=f"[w{len(sessions) + 1}] ", turns=turns))
+            slot = pool.acquire(timeout=0)
+
+        def extractor(session: BrowserSession):
+            def extract(q: str) -> Optional[Dict]:
+                session.log(f"Sending: {q}")
+                record = session.send(q)
+                if record is not None:
+                    session.log(f"  ✓ Got response ({record['response_len']} chars, "
+                                f"{record['latency_complete_s']:.2f}s)")
+                return record
+            return extract
+
+        return pipeline.run(queries, [extractor(s) for s in sessions], ready=ready)
+    finally:
+        pool.close()
+        _report_retries(retry)
+
+def save_results(scraped: List[Dict]):
+    if scraped:
+        df = transform(scraped)
+        load_outputs(df)
+        # Also save raw JSON if desired
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        with open(os.path.join(OUTPUT_DIR, "chat_responses.json"), "w", encoding="utf-8") as f:
+            json.dump(scraped, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved:\n  - {CSV_PATH}\n  - {DB_PATH}\n  - {PARQUET_DIR}/\n"
+              f"  - {os.path.join(OUTPUT_DIR, 'chat_responses.json')}")
+    else:
+        print("No records scraped.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local chat scraper & ETL")
+    parser.add_argument("--mode", choices=["browser", "http"], default="browser",
+                        help="extraction backend: drive Chrome or post to API_URL directly")
+    parser.add_argument("--concurrency", type=int, default=HTTP_CONCURRENCY,
+                        help="max in-flight requests in http mode (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="number of parallel browser sessions (default: %(default)s)")
+    parser.add_argument("--completion", default=",".join(COMPLETION),
+                        help=f"comma-separated completion strategies ({', '.join(STRATEGIES)}; "
+                             f"default: %(default)s)")
+    parser.add_argument("--stream", action="store_true",
+                        help="append each record to JSONL/CSV/SQLite as it is scraped "
+                             "instead of writing everything at the end")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run extract, transform and load concurrently as an asyncio pipeline "
+                             "with bounded queues (outputs are streamed, as with --stream)")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"skip queries already completed in {CHECKPOINT_PATH} and retry failed ones")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass the response cache (fresh responses are still cached)")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS,
+                        help="run Chrome headless")
+    parser.add_argument("--lean", action="store_true", default=LEAN_BROWSER,
+                        help="lean Chrome profile: eager page loads, small viewport, "
+                             "no images/fonts/CSS, capped JS heap")
+    parser.add_argument("--typing", choices=TYPING_MODES, default=TYPING_MODE,
+                        help="how queries are typed into the chat box (default: %(default)s)")
+    parser.add_argument("--turns", type=int, default=CONVERSATION_TURNS,
+                        help="browser mode: turns per conversation before a new chat is opened "
+                             "(0: never; default: %(default)s)")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help=f"attempts per query before it goes to {DEAD_LETTER_PATH} (default: %(default)s)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write per-stage timings at the end of the run (*.prom: Prometheus text, "
+                             "otherwise JSON)")
+    parser.add_argument("--timing-log", metavar="PATH",
+                        help="also log every timed stage as a JSON line to PATH")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    completion = [c.strip() for c in args.completion.split(",") if c.strip()]
+    build_strategies(completion)   # fail fast on typos
+    if args.timing_log:
+        configure_timing_log(args.timing_log)
+    queries = [
+        "What is AI?",
+        "Explain supervised vs unsupervised learning.",
+        "Give 3 use cases of Selenium."
+    ]
+
+    store = CheckpointStore(CHECKPOINT_PATH, target=BASE_URL) if args.resume else None
+    if store:
+        todo = store.plan(queries)
+        print(f"Checkpoint: {len(queries) - len(todo)} queries skipped (done or duplicate), "
+              f"{len(todo)} to scrape.")
+        queries = todo
+    else:
+        queries = dedup_queries(queries)
+
+    def persisted(records: List[Dict]):
+        if store:
+            store.mark_done(r["query"] for r in records)
+
+    cache = ResponseCache(CACHE_PATH, target=BASE_URL, bypass=args.no_cache)
+    hits, queries = cache.split(queries)
+    if hits:
+        print(f"Cache: {len(hits)} responses served from cache, {len(queries)} to scrape.")
+
+    def cache_record(record: Dict):
+        record["cached"] = False
+        cache.put(record["query"], record)
+
+    def cache_and_stream(record: Dict):
+        cache_record(record)
+        loader.add(record)
+
+    if args.pipeline:
+        loader = open_pipeline(on_record=cache_record, on_flush=persisted)
+    else:
+        loader = open_stream_loader(on_flush=persisted) if args.stream else None
+    on_record = cache_and_stream if loader else None
+    try:
+        if loader and not args.pipeline:
+            for record in hits:
+                loader.add(record)
+        if args.pipeline:
+            print(f"Running {len(queries)} queries through the async pipeline ({args.mode} mode)…")
+            stats = scrape_pipeline(queries, loader, mode=args.mode, workers=args.workers,
+                                    concurrency=args.concurrency, headless=args.headless,
+                                    completion=completion, lean=args.lean, typing_mode=args.typing,
+                                    retry=make_retry(args.max_attempts), ready=hits, turns=args.turns)
+            print(f"Pipeline: extract {stats['extract_s']}s, end-to-end {stats['total_s']}s "
+                  f"(transform/load tail {stats['tail_s']}s, extract stalled {stats['stalled_s']}s)")
+        elif args.mode == "http":
+            print(f"Posting {len(queries)} queries to {API_URL} (concurrency={args.concurrency})…")
+            scraped = scrape_http(queries, concurrency=args.concurrency, api_url=API_URL,
+                                  on_record=on_record)
+        elif args.workers > 1:
+            print(f"Launching {args.workers} browser sessions…")
+            scraped = run_worker_pool(queries, workers=args.workers, headless=args.headless,
+                                      completion=completion, on_record=on_record, lean=args.lean,
+                                      typing_mode=args.typing, retry=make_retry(args.max_attempts),
+                                      turns=args.turns)
+        else:
+            scraped = scrape_sequential(queries, headless=args.headless, completion=completion,
+                                        on_record=on_record, lean=args.lean, typing_mode=args.typing,
+                                        retry=make_retry(args.max_attempts), turns=args.turns)
+        if not loader:
+            for record in scraped:
+                record["cached"] = False
+                cache.put(record["query"], record)
+            scraped = hits + scraped
+            save_results(scraped)
+            persisted(scraped)
+    finally:
+        print(f"Cache: {cache.stats()}")
+        cache.close()
+        if loader:
+            loader.close()
+            print(f"\nStreamed {loader.written} records:\n  - {JSONL_PATH}\n  - {CSV_PATH}\n  - {DB_PATH}"
+                  f"\n  - {PARQUET_DIR}/")
+        if store:
+            failed = store.fail_pending()
+            if failed:
+                print(f"Checkpoint: {failed} queries failed; re-run with --resume to retry them.")
+            store.close()
+        print(f"\nStage timings:\n{summary()}")
+        if args.metrics:
+            write_metrics(args.metrics)
+            print(f"Metrics: {args.metrics}")
 
 if __name__ == "__main__":
     main()
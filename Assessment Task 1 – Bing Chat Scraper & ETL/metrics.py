@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing for the scrapers and the ETL.
+
+    with span("wait", source="local"):
+        ...
+
+Each finished span is added to a process-wide registry (count, total, max and
+a histogram per stage and label set) that can be exported as a JSON file or
+as Prometheus text exposition. A span costs one perf_counter pair and a
+locked dict update (a few microseconds), so it stays on in production. When
+the "scraper.timing" logger is at DEBUG, every span is also logged as a
+structured record; configure_timing_log() writes those as JSON lines.
+"""
+
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# ---------------- Configuration ----------------
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)   # seconds
+METRIC_NAME = "scraper_stage_seconds"
+LOGGER_NAME = "scraper.timing"
+# ------------------------------------------------
+
+log = logging.getLogger(LOGGER_NAME)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the span fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": round(record.created, 6), "level": record.levelname,
+                 "logger": record.name, "msg": record.getMessage()}
+        for key in ("stage", "seconds", "labels"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        return json.dumps(entry, ensure_ascii=False)
+
+def configure_timing_log(path: str) -> logging.Handler:
+    """Log every span as a JSON line to `path`."""
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(JsonFormatter())
+    log.addHandler(handler)
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    return handler
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(labels: Tuple[Tuple[str, str], ...]) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Metrics:
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (stage, labels) -> [count, total, max, per-bucket counts (last = +Inf)]
+        self._series: Dict[Tuple, List] = {}
+
+    def observe(self, stage: str, seconds: float, **labels):
+        key = (stage, tuple(sorted(labels.items())))
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+            s[3][slot] += 1
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s took %.4fs", stage, seconds,
+                      extra={"stage": stage, "seconds": round(seconds, 6), "labels": labels})
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """Time the block (also when it raises) under `stage`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0, **labels)
+
+    def timed(self, stage: str, **labels):
+        """Decorator form of span()."""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            items = [(k, s[0], s[1], s[2], list(s[3])) for k, s in self._series.items()]
+        out = []
+        for (stage, labels), count, total, peak, buckets in sorted(items):
+            out.append({"stage": stage, "labels": dict(labels), "count": count,
+                        "total_s": round(total, 6), "mean_s": round(total / count, 6),
+                        "max_s": round(peak, 6),
+                        "buckets": {str(le): n for le, n in zip(self.buckets + ("+Inf",), buckets)}})
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (cumulative histogram buckets)."""
+        lines = [f"# HELP {METRIC_NAME} Time spent per scraper/ETL stage.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            items = sorted((k, s[0], s[1], list(s[3])) for k, s in self._series.items())
+        for (stage, labels), count, total, buckets in items:
+            labels = (("stage", stage),) + labels
+            cumulative = 0
+            for le, n in zip(self.buckets + ("+Inf",), buckets):
+                cumulative += n
+                lines.append(f"{METRIC_NAME}_bucket{_label_str(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{METRIC_NAME}_sum{_label_str(labels)} {total:.6f}")
+            lines.append(f"{METRIC_NAME}_count{_label_str(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics to `path`: Prometheus text for *.prom, JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".prom"):
+                f.write(self.prometheus())
+            else:
+                json.dump({"generated_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                           "stages": self.snapshot()}, f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+METRICS = Metrics()
+span = METRICS.span
+timed = METRICS.timed
+write_metrics = METRICS.write
+
+def summary(metrics: Optional[Metrics] = None) -> str:
+    """One line per stage: count, mean and max, for end-of-run printing."""
+    rows = (metrics or METRICS).snapshot()
+    return "\n".join(
+        f"  {r['stage']:<14} {_label_str(tuple(r['labels'].items())):<18} n={r['count']:<6} "
+        f"mean {r['mean_s'] * 1000:9.2f}ms  max {r['max_s'] * 1000:9.2f}ms" for r in rows)
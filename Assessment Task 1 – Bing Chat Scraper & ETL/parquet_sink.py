@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet output partitioned by target and date.
+
+Files land in a hive-style layout that analytical readers can prune:
+
+    scraped_data/parquet/target=127.0.0.1_5000/date=2024-05-01/part-<uuid>-0.parquet
+
+Every write (one run, one chunk or one streamed batch of `rows_per_file`)
+appends new zstd-compressed files; nothing is rewritten. read_responses()
+loads only the requested columns and partitions.
+"""
+
+import os
+import re
+import uuid
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# ---------------- Configuration ----------------
+COMPRESSION = "zstd"
+ROWS_PER_FILE = 50_000            # ParquetSink buffers this many rows per file
+# ------------------------------------------------
+
+# Fixed Arrow types for the known columns, so files from streamed batches, bulk
+# runs and archive chunks share one schema; other columns keep inferred types
+COLUMN_TYPES = {
+    "query": pa.string(),
+    "response": pa.string(),
+    "timestamp_utc": pa.string(),
+    "response_len": pa.int64(),
+    "cached": pa.bool_(),
+    "echo_ok": pa.bool_(),
+    "echoed_query": pa.string(),
+    "server_length": pa.int64(),
+    "server_time": pa.timestamp("us", tz="UTC"),
+    "latency_ms": pa.float64(),
+    "length_mismatch": pa.bool_(),
+    "query_mismatch": pa.bool_(),
+    "latency_type_s": pa.float64(),
+    "typing_s": pa.float64(),
+    "latency_first_s": pa.float64(),
+    "latency_complete_s": pa.float64(),
+    "parse_s": pa.float64(),
+    "conversation_id": pa.string(),
+    "turn_id": pa.int64(),
+}
+
+def target_slug(url: str) -> str:
+    """'http://127.0.0.1:5000/chat' -> '127.0.0.1_5000' (safe as a directory name)."""
+    netloc = urlparse(url).netloc or url
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", netloc)
+
+PARTITION_SCHEMA = pa.schema([("target", pa.string()), ("date", pa.string())])
+
+def _partitioning():
+    return ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+def write_parquet(df: pd.DataFrame, root: str, target: str) -> int:
+    """Append `df` under `root`, partitioned by target and the date of timestamp_utc."""
+    if df.empty:
+        return 0
+    os.makedirs(root, exist_ok=True)
+    out = df.copy()
+    out["target"] = target_slug(target)
+    out["date"] = out["timestamp_utc"].astype(str).str[:10]
+    if "server_time" in out:   # ISO strings when rows came through the streaming sinks
+        out["server_time"] = pd.to_datetime(out["server_time"], utc=True, errors="coerce", format="ISO8601")
+    table = pa.Table.from_pandas(out, preserve_index=False)
+    for i, name in enumerate(table.column_names):
+        if name in COLUMN_TYPES and table.schema.field(i).type != COLUMN_TYPES[name]:
+            table = table.set_column(i, name, table.column(i).cast(COLUMN_TYPES[name]))
+    ds.write_dataset(
+        table, root, format="parquet", partitioning=_partitioning(),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+    )
+    return len(out)
+
+def _dataset(root: str, columns: Optional[Sequence[str]], flt: Optional[ds.Expression]) -> Optional[ds.Dataset]:
+    """The files under `root` whose partitions match `flt`; None if there are none."""
+    # Listing the files and pruning by partition path opens no file
+    listing = ds.dataset(root, format="parquet", partitioning=_partitioning(), schema=PARTITION_SCHEMA)
+    fragments = list(listing.get_fragments(filter=flt) if flt is not None else listing.get_fragments())
+    if not fragments:
+        return None
+    known = pa.schema(list(COLUMN_TYPES.items())) if columns else pa.schema([])
+    if columns and all(c in known.names or c in PARTITION_SCHEMA.names for c in columns):
+        schema = known        # every requested column has a fixed type: no footer to read
+    else:
+        # Files written by different runs may carry different columns (e.g. latency columns
+        # only exist for browser runs): read against the union of the selected files' footers
+        schema = pa.unify_schemas([f.physical_schema for f in fragments] + [known],
+                                  promote_options="permissive")
+    return ds.dataset([f.path for f in fragments], format="parquet", partitioning=_partitioning(),
+                      partition_base_dir=root, schema=pa.unify_schemas([schema, PARTITION_SCHEMA]))
+
+def read_responses(root: str, columns: Optional[Sequence[str]] = None,
+                   start: Optional[Union[str, date]] = None, end: Optional[Union[str, date]] = None,
+                   targets: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read scraped responses, touching only the needed columns and partitions.
+
+    `start`/`end` are inclusive dates (YYYY-MM-DD); `targets` are URLs or slugs.
+    """
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=list(columns or []))
+    flt = None
+    if start is not None:
+        flt = ds.field("date") >= str(start)
+    if end is not None:
+        cond = ds.field("date") <= str(end)
+        flt = cond if flt is None else flt & cond
+    if targets:
+        cond = ds.field("target").isin([target_slug(t) for t in targets])
+        flt = cond if flt is None else flt & cond
+    dataset = _dataset(root, columns, flt)
+    if dataset is None:
+        return pd.DataFrame(columns=list(columns or []))
+    return dataset.to_table(columns=list(columns) if columns else None, filter=flt).to_pandas()
+
+class ParquetSink:
+    """
+    Streaming sink: buffers rows and writes one Parquet file per `rows_per_file`
+    rows (and on close). Buffered rows are not crash-safe; the JSONL/SQLite
+    sinks are the durable copies.
+    """
+
+    def __init__(self, root: str, target: str, rows_per_file: int = ROWS_PER_FILE):
+        self.root = root
+        self.target = target
+        self.rows_per_file = rows_per_file
+        self._rows: List[Dict] = []
+
+    def write(self, rows: List[Dict]):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.rows_per_file:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            rows, self._rows = self._rows, []
+            write_parquet(pd.DataFrame(rows), self.root, self.target)
+
+    def close(self):
+        self._flush()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Asyncio extract -> transform -> load pipeline with bounded queues.
+
+    extract workers --records--> transform (micro-batches) --batches--> one writer per sink
+
+Each stage is a coroutine and the blocking work in it (a browser or HTTP
+request, the pandas transform, a sink write) runs in a thread, so the stages
+overlap: while the extract workers wait on the target, earlier micro-batches
+are transformed and written. End-to-end time is the extract time plus about
+one batch of transform and load.
+
+Every queue is bounded. A slow sink fills its queue, which stalls the
+transform stage, which fills the records queue, which stalls the extract
+workers: memory is bounded by the queue sizes, not by the number of queries.
+
+    pipeline = AsyncPipeline([CsvSink(...), SqliteSink(...)], transform=transform,
+                             raw_sinks=[JsonlSink(...)])
+    stats = pipeline.run(queries, extractors=[session.send for session in sessions])
+
+An extractor is a blocking callable query -> record (None when the query
+failed). One worker runs per extractor: two browser sessions are two
+extractors; for HTTP the same extractor can be passed `concurrency` times.
+An extractor that raises stops its worker, and the query goes back to the
+workers still running.
+"""
+
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sinks import BATCH_SIZE, _clean, _sink_name, frame_rows
+from metrics import span
+
+# ---------------- Configuration ----------------
+QUEUE_SIZE = 4                    # micro-batches buffered in front of each stage
+FLUSH_INTERVAL_S = 1.0            # a partial batch is written after this long without new records
+# ------------------------------------------------
+
+_DONE = object()                  # end-of-stream marker passed down the queues
+
+Extractor = Callable[[str], Optional[Dict]]
+
+class AsyncPipeline:
+    """
+    `transform` (e.g. local_chat_scraper.transform) maps a micro-batch of
+    records to a DataFrame; `raw_sinks` get the records untransformed.
+    `on_record` is called with each extracted record and `on_flush` with each
+    raw batch once every sink has written it, both on the event loop thread.
+    """
+
+    def __init__(self, sinks: Sequence, transform: Optional[Callable] = None, raw_sinks: Sequence = (),
+                 batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL_S,
+                 on_record: Optional[Callable[[Dict], None]] = None,
+                 on_flush: Optional[Callable[[List[Dict]], None]] = None):
+        self.sinks = list(sinks)
+        self.raw_sinks = list(raw_sinks)
+        self.transform = transform
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.on_record = on_record
+        self.on_flush = on_flush
+        self.written = 0
+
+    def run(self, queries: Sequence[str], extractors: Sequence[Extractor], ready: Sequence[Dict] = ()) -> Dict:
+        """Scrape `queries` and load the records; `ready` records (e.g. cache hits) skip extraction."""
+        return asyncio.run(self.run_async(queries, extractors, ready))
+
+    def _rows(self, batch: List[Dict]) -> List[Dict]:
+        return frame_rows(self.transform(batch))
+
+    @staticmethod
+    def _write(sink, rows: List[Dict]):
+        with span("load", sink=_sink_name(sink)):
+            sink.write(rows)
+
+    async def run_async(self, queries: Sequence[str], extractors: Sequence[Extractor],
+                        ready: Sequence[Dict] = ()) -> Dict:
+        loop = asyncio.get_running_loop()
+        records: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size * self.batch_size)
+        writers = [(sink, True, asyncio.Queue(maxsize=self.queue_size)) for sink in self.raw_sinks]
+        writers += [(sink, False, asyncio.Queue(maxsize=self.queue_size)) for sink in self.sinks]
+        pending: Dict[int, List] = {}     # batch id -> [sink writes left, raw batch]
+        stats = {"extracted": 0, "failed": 0, "written": 0, "batches": 0, "extract_s": None,
+                 "stalled_s": 0.0, "max_records_queued": 0}
+        jobs = iter(queries)              # shared by the workers; only the loop thread advances it
+        returned: List[str] = []          # queries of stopped workers, taken before new ones
+        t0 = time.perf_counter()
+        # One thread per extract worker, one for the transform and one per sink (sinks are not
+        # thread-safe, and one thread each keeps every sink's batches in order)
+        extract_pool = ThreadPoolExecutor(max_workers=max(1, len(extractors)), thread_name_prefix="extract")
+        transform_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transform")
+        sink_pools = [ThreadPoolExecutor(max_workers=1, thread_name_prefix="load") for _ in writers]
+
+        async def put_record(record: Dict):
+            t = time.perf_counter()
+            await records.put(record)     # blocks while the downstream stages are behind
+            stats["stalled_s"] += time.perf_counter() - t
+            stats["max_records_queued"] = max(stats["max_records_queued"], records.qsize())
+
+        async def extract_worker(extract: Extractor):
+            while True:
+                q = returned.pop() if returned else next(jobs, _DONE)
+                if q is _DONE:
+                    return
+                try:
+                    record = await loop.run_in_executor(extract_pool, extract, q)
+                except Exception as e:    # e.g. a browser that cannot be restarted
+                    returned.append(q)
+                    print(f"  ! Extract worker stopped: {e}")
+                    return
+                if record is None:
+                    stats["failed"] += 1
+                    continue
+                stats["extracted"] += 1
+                if self.on_record is not None:
+                    self.on_record(record)
+                await put_record(record)
+
+        async def extract_stage():
+            for record in ready:
+                await put_record(record)
+            await asyncio.gather(*(extract_worker(e) for e in extractors))
+            # Left over when the worker that could have taken them had already finished
+            unsent = len(returned) + sum(1 for _ in jobs)
+            if unsent:
+                stats["failed"] += unsent
+                print(f"  ! {unsent} queries not sent: no extract worker was left to take them")
+            stats["extract_s"] = round(time.perf_counter() - t0, 4)
+            await records.put(_DONE)
+
+        async def emit(batch: List[Dict]):
+            raw = [_clean(r) for r in batch]
+            rows = await loop.run_in_executor(transform_pool, self._rows, batch) if self.transform else raw
+            bid = stats["batches"]
+            stats["batches"] += 1
+            if not writers:
+                stats["written"] += len(batch)
+                return
+            pending[bid] = [len(writers), batch]
+            for _, is_raw, q in writers:
+                await q.put((bid, raw if is_raw else rows))
+
+        async def transform_stage():
+            batch: List[Dict] = []
+            # One get() kept across flush timeouts, so no record is lost to a timed-out wait
+            getter: Optional[asyncio.Task] = None
+            try:
+                while True:
+                    if getter is None:
+                        getter = asyncio.ensure_future(records.get())
+                    done, _ = await asyncio.wait({getter}, timeout=self.flush_interval if batch else None)
+                    item = None           # None: quiet for a while, write the partial batch
+                    if done:
+                        item, getter = getter.result(), None
+                    if item is not None and item is not _DONE:
+                        batch.append(item)
+                    if batch and (item is None or item is _DONE or len(batch) >= self.batch_size):
+                        await emit(batch)
+                        batch = []
+                    if item is _DONE:
+                        break
+            finally:
+                if getter is not None:
+                    getter.cancel()
+            for _, _, q in writers:
+                await q.put(_DONE)
+
+        async def writer(sink, q: asyncio.Queue, pool: ThreadPoolExecutor):
+            while True:
+                item = await q.get()
+                if item is _DONE:
+                    return
+                bid, rows = item
+                await loop.run_in_executor(pool, self._write, sink, rows)
+                entry = pending[bid]
+                entry[0] -= 1
+                if entry[0] == 0:         # every sink has this batch
+                    del pending[bid]
+                    stats["written"] += len(entry[1])
+                    self.written += len(entry[1])
+                    if self.on_flush is not None:
+                        self.on_flush(entry[1])
+
+        tasks = [asyncio.create_task(extract_stage()), asyncio.create_task(transform_stage())]
+        tasks += [asyncio.create_task(writer(sink, q, pool)) for (sink, _, q), pool in zip(writers, sink_pools)]
+        try:
+            # A failing stage (e.g. a sink write error) stops the whole pipeline instead of
+            # leaving the other stages blocked on a queue nobody drains
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Do not wait for a stuck request; do let a sink finish its write before close()
+            extract_pool.shutdown(wait=False, cancel_futures=True)
+            for pool in [transform_pool] + sink_pools:
+                pool.shutdown(wait=True, cancel_futures=True)
+        stats["total_s"] = round(time.perf_counter() - t0, 4)
+        stats["stalled_s"] = round(stats["stalled_s"], 4)
+        # What transform + load added after the last record was extracted
+        stats["tail_s"] = round(stats["total_s"] - (stats["extract_s"] or 0.0), 4)
+        return stats
+
+    def close(self):
+        for sink in self.raw_sinks + self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
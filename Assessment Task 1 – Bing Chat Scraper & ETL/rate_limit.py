@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Adaptive, shared rate limiting for the scrapers.
+
+One AdaptiveRateLimiter is shared by every session/thread of a run:
+
+- a token bucket per target caps the request rate (tokens/s, small burst)
+- a semaphore caps how many requests are in flight across all targets
+- AIMD: each fast success adds `increase` to the target's rate; a slow
+  response (latency above `target_latency_s`) or a timeout multiplies it by
+  `decrease` (at most once per `target_latency_s`, so one slow burst of
+  concurrent responses counts once), always within [min_rate, max_rate]
+- timeouts also put the target into exponential backoff with jitter: every
+  session pauses before its next request, and the pause doubles per
+  consecutive timeout up to `backoff_max_s`
+
+    limiter = AdaptiveRateLimiter(rate=0.5)
+    with limiter.slot(target) as ticket:
+        record = send(...)
+        ticket.ok(record["latency_complete_s"])    # or ticket.timeout()
+"""
+
+import time
+import random
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from metrics import span
+
+# ---------------- Configuration ----------------
+INITIAL_RATE = 0.3                # requests/s per target when a run starts
+MIN_RATE = 0.05
+MAX_RATE = 2.0
+BURST = 1                         # requests a bucket may send back to back
+INCREASE = 0.05                   # additive increase (requests/s) per fast success
+DECREASE = 0.5                    # multiplicative decrease on a slow response or timeout
+TARGET_LATENCY_S = 5.0            # responses slower than this count as "slow"
+MAX_CONCURRENCY = 8               # requests in flight across all targets
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 120.0
+# ------------------------------------------------
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class _TargetState:
+    def __init__(self, rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.failures = 0              # consecutive timeouts
+        self.blocked_until = 0.0       # monotonic time the backoff ends
+        self.last_decrease = 0.0
+
+class Ticket:
+    """Handed out by AdaptiveRateLimiter.slot(): report how the request went."""
+
+    def __init__(self, limiter: "AdaptiveRateLimiter", target: str):
+        self._limiter = limiter
+        self._target = target
+
+    def ok(self, latency_s: Optional[float] = None):
+        self._limiter.record_success(self._target, latency_s)
+
+    def timeout(self) -> float:
+        return self._limiter.record_timeout(self._target)
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate: float = INITIAL_RATE, min_rate: float = MIN_RATE,
+                 max_rate: float = MAX_RATE, burst: float = BURST, increase: float = INCREASE,
+                 decrease: float = DECREASE, target_latency_s: float = TARGET_LATENCY_S,
+                 max_concurrency: int = MAX_CONCURRENCY, backoff_base_s: float = BACKOFF_BASE_S,
+                 backoff_max_s: float = BACKOFF_MAX_S):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency_s = target_latency_s
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeouts = 0
+        self._inflight = threading.BoundedSemaphore(max_concurrency)
+        self._targets: Dict[str, _TargetState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, target: str) -> _TargetState:
+        with self._lock:
+            state = self._targets.get(target)
+            if state is None:
+                state = self._targets[target] = _TargetState(self.initial_rate, self.burst)
+            return state
+
+    def acquire(self, target: str):
+        """Wait out any backoff for `target`, then for a token from its bucket."""
+        state = self._state(target)
+        while True:
+            delay = state.blocked_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        state.bucket.acquire()
+
+    @contextmanager
+    def slot(self, target: str):
+        """Take a token for `target`, then hold one of the in-flight slots around the request."""
+        with span("rate_limit"):
+            self.acquire(target)
+        with self._inflight:
+            yield Ticket(self, target)
+
+    def _set_rate(self, state: _TargetState, rate: float):
+        state.bucket.set_rate(min(self.max_rate, max(self.min_rate, rate)))
+
+    def record_success(self, target: str, latency_s: Optional[float] = None):
+        state = self._state(target)
+        now = time.monotonic()
+        with self._lock:
+            state.failures = 0
+            rate = state.bucket.rate
+            if latency_s is not None and latency_s > self.target_latency_s:
+                if now - state.last_decrease < self.target_latency_s:
+                    return
+                state.last_decrease = now
+                rate *= self.decrease
+            else:
+                rate += self.increase
+            self._set_rate(state, rate)
+
+    def record_timeout(self, target: str) -> float:
+        """Slow down and back off; returns the backoff (seconds) every session now waits."""
+        state = self._state(target)
+        now = time.monotonic()
+        with self._lock:
+            self.timeouts += 1
+            state.failures += 1
+            cap = min(self.backoff_max_s, self.backoff_base_s * 2 ** (state.failures - 1))
+            delay = cap / 2 + random.uniform(0, cap / 2)   # "equal jitter"
+            state.blocked_until = max(state.blocked_until, now + delay)
+            rate = state.bucket.rate
+            if now - state.last_decrease >= self.target_latency_s:
+                state.last_decrease = now
+                rate *= self.decrease
+            self._set_rate(state, rate)
+        return delay
+
+    def rate(self, target: str) -> float:
+        return self._state(target).bucket.rate
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"timeouts": self.timeouts,
+                    "rates": {t: round(s.bucket.rate, 3) for t, s in self._targets.items()}}
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Retries and failure isolation for the browser scrapers.
+
+Every exception raised while sending a query is classified:
+
+- transient:   the page is fine but the answer did not arrive in time
+               (TimeoutException) or the target answered with an error
+               (ChatBackendError). Retried on the same page; the rate
+               limiter's backoff already spaces the attempts out, and
+               repeated timeouts on one query reload the page.
+- page_broken: the page is in a bad state (stale or missing elements, a
+               script error, a crashed tab). The chat page is reloaded
+               before the retry.
+- driver_dead: the browser or chromedriver is gone (invalid session, lost
+               connection). The browser is restarted before the retry.
+- fatal:       anything else (a bug, bad data). Retrying would fail the same
+               way, so the query is not retried.
+
+A query that still fails after `max_attempts` (or fails fatally) is written
+to the dead-letter file with its error history and the run moves on. A page
+reload that fails is escalated to a browser restart; only a browser that
+cannot be restarted, or `max_consecutive_dead` dead letters in a row (the
+site itself is down), ends the session.
+
+The dead-letter file is JSONL with a "query" field, so it can be fed back in:
+
+    python batch_runner.py scraped_data/dead_letters.jsonl
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from http.client import HTTPException
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchWindowException,
+                                        TimeoutException, WebDriverException)
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+from metrics import span
+
+# ---------------- Configuration ----------------
+MAX_ATTEMPTS = 3                  # attempts per query before it is dead-lettered
+RELOAD_AFTER_TIMEOUTS = 2         # timeouts in a row on one query before the page is reloaded
+MAX_CONSECUTIVE_DEAD = 10         # dead letters in a row before a session gives up
+DEAD_LETTER_PATH = os.path.join("scraped_data", "dead_letters.jsonl")
+# ------------------------------------------------
+
+TRANSIENT, PAGE_BROKEN, DRIVER_DEAD, FATAL = "transient", "page_broken", "driver_dead", "fatal"
+RELOAD, RESTART = "reload", "restart"
+
+# WebDriverException messages meaning the browser or chromedriver is gone
+DRIVER_DEAD_MARKERS = ("invalid session id", "session deleted", "chrome not reachable",
+                       "disconnected", "target window already closed", "no such window")
+
+T = TypeVar("T")
+
+class SessionFailed(RuntimeError):
+    """The session cannot go on: its browser will not restart or every query is failing."""
+
+class ChatBackendError(Exception):
+    """The chat page showed an error (e.g. a failed backend request) instead of a reply."""
+
+def classify(exc: BaseException) -> str:
+    if isinstance(exc, (InvalidSessionIdException, NoSuchWindowException)):
+        return DRIVER_DEAD
+    if isinstance(exc, (TimeoutException, ChatBackendError)):
+        return TRANSIENT
+    if isinstance(exc, WebDriverException):
+        msg = (exc.msg or "").lower()
+        return DRIVER_DEAD if any(m in msg for m in DRIVER_DEAD_MARKERS) else PAGE_BROKEN
+    if isinstance(exc, (ConnectionError, Urllib3Error, HTTPException)):
+        return DRIVER_DEAD   # chromedriver's HTTP endpoint no longer answers
+    return FATAL
+
+def describe(exc: BaseException) -> str:
+    """Exception name and the first line of its message (WebDriver messages carry stack traces)."""
+    msg = (getattr(exc, "msg", None) or str(exc)).split("; For documentation")[0].strip().splitlines()
+    return f"{type(exc).__name__}: {msg[0]}" if msg else type(exc).__name__
+
+class DeadLetterQueue:
+    """Append-only JSONL file of queries that could not be scraped; shared by all sessions."""
+
+    def __init__(self, path: str = DEAD_LETTER_PATH, target: Optional[str] = None):
+        self.path = path
+        self.target = target
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def put(self, query: str, errors: List[Dict]):
+        entry = {"query": query, "target": self.target,
+                 "failed_at": datetime.utcnow().isoformat() + "Z",
+                 "attempts": len(errors), "error_class": errors[-1]["class"], "errors": errors}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.count += 1
+
+class RetryPolicy:
+    def __init__(self, dead_letters: Optional[DeadLetterQueue] = None, max_attempts: int = MAX_ATTEMPTS,
+                 reload_after_timeouts: int = RELOAD_AFTER_TIMEOUTS,
+                 max_consecutive_dead: int = MAX_CONSECUTIVE_DEAD):
+        """
+        One policy can be shared by every session of a run; the dead-letter
+        streak is then counted across sessions.
+        """
+        self.dead_letters = dead_letters
+        self.max_attempts = max_attempts
+        self.reload_after_timeouts = reload_after_timeouts
+        self.max_consecutive_dead = max_consecutive_dead
+        self.counts = {TRANSIENT: 0, PAGE_BROKEN: 0, DRIVER_DEAD: 0, FATAL: 0,
+                       "retried": 0, RELOAD: 0, RESTART: 0, "dead_lettered": 0}
+        self._streak = 0
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _recover(self, recover: Callable[[str], None], action: str, log: Callable[[str], None]):
+        """Run `recover(action)`; a failed reload becomes a restart, a failed restart ends the session."""
+        try:
+            with span("recover", action=action):
+                recover(action)
+            self._count(action)
+        except Exception as e:
+            if action == RESTART:
+                raise SessionFailed(f"browser restart failed: {describe(e)}") from e
+            log(f"  ! Reload failed ({describe(e)}); restarting the browser")
+            self._recover(recover, RESTART, log)
+
+    def run(self, query: str, send: Callable[[], T], recover: Callable[[str], None],
+            log: Callable[[str], None] = print) -> Optional[T]:
+        """
+        `send()` one attempt at `query` until it succeeds, recovering between
+        attempts with `recover(RELOAD | RESTART)`. Returns None when the query
+        was dead-lettered.
+        """
+        errors: List[Dict] = []
+        timeouts = 0
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = send()
+            except SessionFailed:
+                raise
+            except Exception as e:
+                kind = classify(e)
+                self._count(kind)
+                errors.append({"attempt": attempt, "class": kind, "error": describe(e)})
+                if kind == FATAL or attempt == self.max_attempts:
+                    break
+                timeouts = timeouts + 1 if kind == TRANSIENT else 0
+                action = {PAGE_BROKEN: RELOAD, DRIVER_DEAD: RESTART}.get(kind)
+                if kind == TRANSIENT and timeouts >= self.reload_after_timeouts:
+                    action = RELOAD
+                log(f"  ! {kind} ({errors[-1]['error']}); retry {attempt}/{self.max_attempts - 1}"
+                    + (f" after a {action}" if action else ""))
+                self._count("retried")
+                if action:
+                    self._recover(recover, action, log)
+                continue
+            with self._lock:
+                self._streak = 0
+            return result
+
+        self._count("dead_lettered")
+        log(f"  ! Giving up after {len(errors)} attempt(s): {errors[-1]['class']}"
+            + (f"; written to {self.dead_letters.path}" if self.dead_letters else ""))
+        if self.dead_letters:
+            self.dead_letters.put(query, errors)
+        with self._lock:
+            self._streak += 1
+            streak = self._streak
+        if self.max_consecutive_dead and streak >= self.max_consecutive_dead:
+            raise SessionFailed(f"{streak} queries in a row failed; is the site down?")
+        return None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {k: v for k, v in self.counts.items() if v}
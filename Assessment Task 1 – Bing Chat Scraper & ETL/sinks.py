@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Streaming, append-only sinks for scraped records.
+
+Records are written as they are produced (in small batches) instead of once at
+the end of a run, so a crash only loses the current unflushed batch and memory
+does not grow with the run size. Each sink keeps one open file/connection for
+its whole lifetime and commits every batch as a unit:
+
+- JsonlSink:  one JSON object per line, flushed per batch
+- CsvSink:    appends rows; the file is rewritten only when new columns appear
+- SqliteSink: one SqliteLoader connection, batched upserts inside a transaction
+
+StreamingLoader buffers records, optionally runs a transform over each
+micro-batch, and fans the rows out to all sinks (raw_sinks get the records
+untransformed).
+"""
+
+import os
+import csv
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from metrics import span
+from sqlite_loader import SqliteLoader
+
+# ---------------- Configuration ----------------
+BATCH_SIZE = 25                   # records buffered before a flush
+# ------------------------------------------------
+
+def _clean_value(v):
+    if v is None or isinstance(v, (str, bool, int)):
+        return v
+    if pd.isna(v):                        # NaN / NaT / pd.NA
+        return None
+    if hasattr(v, "isoformat"):           # datetime / pandas Timestamp
+        return v.isoformat()
+    return v
+
+def _clean(row: Dict) -> Dict:
+    """NaN/NaT/NA -> None and timestamps -> ISO strings, so JSON/CSV/SQL get plain values."""
+    return {k: _clean_value(v) for k, v in row.items()}
+
+def frame_rows(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame -> list of sink-ready row dicts."""
+    return [_clean(r) for r in df.to_dict("records")]
+
+class JsonlSink:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, rows: List[Dict]):
+        self._f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        self._f.close()
+
+class CsvSink:
+    """
+    Columns come from the existing header, else `columns`, else the first
+    batch. A batch with columns the header lacks widens it: the file is
+    rewritten once with the new header and empty cells in the old rows.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.columns = list(columns) if columns else None
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline="", encoding="utf-8") as f:
+                self.columns = next(csv.reader(f))
+            self._needs_header = False
+        else:
+            self._needs_header = True
+        self._f = open(path, "a", newline="", encoding="utf-8")
+        self._writer = None
+
+    def _widen(self, new: List[str]):
+        self.columns = self.columns + new
+        self._writer = None
+        if self._needs_header:    # nothing on disk yet
+            return
+        self._f.close()
+        tmp = self.path + ".tmp"
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            next(reader, None)
+            writer = csv.writer(dst)
+            writer.writerow(self.columns)
+            for row in reader:
+                writer.writerow(row + [""] * (len(self.columns) - len(row)))
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.path)
+        self._f = open(self.path, "a", newline="", encoding="utf-8")
+        print(f"  ! {self.path}: added column(s) {', '.join(new)} to the header")
+
+    def write(self, rows: List[Dict]):
+        if not rows:
+            return
+        keys = list(dict.fromkeys(k for r in rows for k in r))
+        if self.columns is None:
+            self.columns = keys
+        new = [k for k in keys if k not in self.columns]
+        if new:
+            self._widen(new)
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._f, fieldnames=self.columns, restval="")
+            if self._needs_header:
+                self._writer.writeheader()
+                self._needs_header = False
+        self._writer.writerows(rows)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        self._f.close()
+
+class SqliteSink:
+    """Upserts rows into `table` through one SqliteLoader connection (one transaction per batch)."""
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self._loader = SqliteLoader(path, table)
+
+    def write(self, rows: List[Dict]):
+        self._loader.write(rows)
+
+    def close(self):
+        self._loader.close()
+
+def _sink_name(sink) -> str:
+    """CsvSink -> "csv", the label load_outputs() uses for the same target."""
+    return type(sink).__name__.replace("Sink", "").lower()
+
+class StreamingLoader:
+    """
+    Thread-safe buffer in front of one or more sinks.
+
+    `transform`, if given, maps a list of records to a DataFrame (e.g.
+    local_chat_scraper.transform) and is applied per micro-batch. `on_flush`
+    is called with each raw batch once every sink has written it.
+    """
+
+    def __init__(self, sinks: Sequence, batch_size: int = BATCH_SIZE,
+                 transform: Optional[Callable] = None, raw_sinks: Sequence = (),
+                 on_flush: Optional[Callable[[List[Dict]], None]] = None):
+        self.sinks = list(sinks)
+        self.raw_sinks = list(raw_sinks)
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.transform = transform
+        self.written = 0
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict):
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        raw = [_clean(r) for r in batch]
+        for sink in self.raw_sinks:
+            with span("load", sink=_sink_name(sink)):
+                sink.write(raw)
+        if self.transform is not None:
+            rows = frame_rows(self.transform(batch))
+        else:
+            rows = raw
+        for sink in self.sinks:
+            with span("load", sink=_sink_name(sink)):
+                sink.write(rows)
+        self.written += len(rows)
+        if self.on_flush is not None:
+            self.on_flush(batch)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            for sink in self.raw_sinks + self.sinks:
+                sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
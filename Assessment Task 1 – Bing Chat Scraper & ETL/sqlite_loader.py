@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Bulk SQLite loader for the chat_messages table.
+
+Replaces df.to_sql(if_exists="replace"): the table has an explicit schema,
+a unique key on (timestamp_utc, query_hash) with upsert semantics (its index
+also serves time-range scans) and an index on query_hash, so repeated
+runs accumulate history instead of dropping it. Rows are inserted with executemany in batches, one transaction
+per batch, on a WAL-mode connection with tuned pragmas.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import normalize_query
+
+# ---------------- Configuration ----------------
+BATCH_ROWS = 50_000               # rows per executemany/transaction
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",   # durable at checkpoint, safe with WAL
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",    # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+]
+# ------------------------------------------------
+
+# Known columns and their SQLite types; columns outside this list are added on demand
+COLUMNS = [
+    ("query_hash", "TEXT NOT NULL"),
+    ("query", "TEXT"),
+    ("response", "TEXT"),
+    ("timestamp_utc", "TEXT NOT NULL"),
+    ("response_len", "INTEGER"),
+    ("cached", "INTEGER"),
+    ("echo_ok", "INTEGER"),
+    ("echoed_query", "TEXT"),
+    ("server_length", "INTEGER"),
+    ("server_time", "TEXT"),
+    ("latency_ms", "REAL"),
+    ("length_mismatch", "INTEGER"),
+    ("query_mismatch", "INTEGER"),
+    ("latency_type_s", "REAL"),
+    ("typing_s", "REAL"),
+    ("latency_first_s", "REAL"),
+    ("latency_complete_s", "REAL"),
+    ("parse_s", "REAL"),
+    ("conversation_id", "TEXT"),
+    ("turn_id", "INTEGER"),
+]
+KEY = ("timestamp_utc", "query_hash")
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(normalize_query(query or "").encode("utf-8")).hexdigest()
+
+def query_hashes(queries: pd.Series) -> List[str]:
+    """query_hash() for a whole column: normalize vectorized, hash each distinct value once."""
+    normalized = (queries.fillna("").astype(str).str.replace(r"\s+", " ", regex=True)
+                  .str.strip().str.casefold())
+    codes, uniques = pd.factorize(normalized)
+    hashes = [hashlib.sha1(q.encode("utf-8")).hexdigest() for q in uniques]
+    return [hashes[c] for c in codes.tolist()]
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class SqliteLoader:
+    def __init__(self, path: str, table: str, batch_rows: int = BATCH_ROWS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.table = table
+        self.batch_rows = batch_rows
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+        self._columns = self._ensure_schema()
+
+    def _ensure_schema(self) -> List[str]:
+        t = _q(self.table)
+        existing = [r[1] for r in self._conn.execute(f"PRAGMA table_info({t})")]
+        with self._conn:
+            if existing and "query_hash" not in existing:
+                # Table from the old to_sql(if_exists="replace") path: keep it, start fresh
+                legacy = f"{self.table}_legacy_{int(time.time())}"
+                self._conn.execute(f"ALTER TABLE {t} RENAME TO {_q(legacy)}")
+                print(f"  ! Renamed schemaless table {self.table} to {legacy}")
+                existing = []
+            if not existing:
+                cols = ",\n    ".join(f"{_q(name)} {decl}" for name, decl in COLUMNS)
+                self._conn.execute(f"""CREATE TABLE {t} (
+    id INTEGER PRIMARY KEY,
+    {cols},
+    UNIQUE ({", ".join(KEY)})
+)""")
+                existing = [r[1] for r in self._conn.execute(f"PRAGMA table_info({t})")]
+            # Time ranges use the UNIQUE (timestamp_utc, query_hash) index; hash lookups need their own.
+            # Tables from earlier runs carry a redundant timestamp_utc index that only slows inserts.
+            self._conn.execute(f"DROP INDEX IF EXISTS {_q('idx_' + self.table + '_timestamp_utc')}")
+            self._create_index()
+        return existing
+
+    def _create_index(self):
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {_q(self._index)} ON {_q(self.table)} (query_hash)")
+
+    @property
+    def _index(self) -> str:
+        return f"idx_{self.table}_query_hash"
+
+    def _is_empty(self) -> bool:
+        return self._conn.execute(f"SELECT 1 FROM {_q(self.table)} LIMIT 1").fetchone() is None
+
+    def _add_columns(self, cols: Iterable[str]):
+        for c in cols:
+            if c not in self._columns:
+                self._conn.execute(f"ALTER TABLE {_q(self.table)} ADD COLUMN {_q(c)}")
+                self._columns.append(c)
+
+    def _upsert_sql(self, cols: Sequence[str]) -> str:
+        updates = ", ".join(f"{_q(c)} = excluded.{_q(c)}" for c in cols if c not in KEY)
+        return (f"INSERT INTO {_q(self.table)} ({', '.join(_q(c) for c in cols)}) "
+                f"VALUES ({', '.join('?' for _ in cols)}) "
+                f"ON CONFLICT ({', '.join(KEY)}) DO UPDATE SET {updates}")
+
+    def _execute_batches(self, cols: List[str], rows: Iterable[tuple]) -> int:
+        sql = self._upsert_sql(cols)
+        rows = iter(rows)
+        total = 0
+        while True:
+            batch = list(islice(rows, self.batch_rows))
+            if not batch:
+                return total
+            with self._conn:
+                self._conn.executemany(sql, batch)
+            total += len(batch)
+
+    def write(self, rows: List[Dict]) -> int:
+        """Upsert plain row dicts (values already SQLite-compatible)."""
+        if not rows:
+            return 0
+        cols = list(dict.fromkeys(k for r in rows for k in r if k != "query_hash"))
+        with self._conn:
+            self._add_columns(cols)
+        cols = ["query_hash"] + cols
+        return self._execute_batches(
+            cols, ((query_hash(r.get("query")),) + tuple(r.get(c) for c in cols[1:]) for r in rows))
+
+    def load_dataframe(self, df: pd.DataFrame) -> int:
+        """Upsert a transformed DataFrame, converting columns vectorized rather than per cell."""
+        if df.empty:
+            return 0
+        cols = [c for c in df.columns if c != "query_hash"]
+        with self._conn:
+            self._add_columns(cols)
+        values = [query_hashes(df["query"])]
+        for c in cols:
+            s = df[c]
+            if pd.api.types.is_datetime64_any_dtype(s.dtype):
+                naive = s.dt.tz_convert("UTC").dt.tz_localize(None) if s.dt.tz is not None else s
+                iso = np.datetime_as_string(naive.to_numpy(dtype="datetime64[us]"), unit="us")
+                suffix = "+00:00" if s.dt.tz is not None else ""
+                values.append([v + suffix if ok else None for v, ok in zip(iso.tolist(), s.notna().tolist())])
+                continue
+            values.append(s.astype(object).where(s.notna(), None).tolist())
+        # Into an empty table, sorting the hashes once after the load beats updating
+        # the query_hash index row by row
+        bulk = self._is_empty()
+        if bulk:
+            with self._conn:
+                self._conn.execute(f"DROP INDEX IF EXISTS {_q(self._index)}")
+        try:
+            return self._execute_batches(["query_hash"] + cols, zip(*values))
+        finally:
+            if bulk:
+                with self._conn:
+                    self._create_index()
+
+    def count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {_q(self.table)}").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
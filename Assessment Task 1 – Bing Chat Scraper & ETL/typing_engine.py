@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Typing simulation for the browser scrapers.
+
+Modes, from fastest to most human-like:
+
+- instant: one send_keys() call with the whole text
+- js:      set the field's value from JavaScript and fire an "input" event
+           (one round trip, no key events at all)
+- chunked: one send_keys() per word with a short pause between words
+- human:   per-key delays drawn from a log-normal model around a target
+           typing speed (words per minute), with longer pauses after spaces
+           and punctuation. All keystrokes and pauses are sent as a single
+           W3C action sequence, so the browser does the waiting and a
+           200-character prompt costs one WebDriver round trip, not 400.
+
+TypingEngine.type() returns the seconds spent; mode_for() picks the default
+mode for a target URL from TARGET_MODES.
+"""
+
+import math
+import time
+import random
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from selenium.webdriver.common.action_chains import ActionChains
+
+# ---------------- Configuration ----------------
+MODES = ("instant", "js", "chunked", "human")
+DEFAULT_MODE = "human"
+TARGET_MODES: Dict[str, str] = {  # host -> mode; hosts not listed use DEFAULT_MODE
+    "bing.com": "human",
+    "www.bing.com": "human",
+}
+HUMAN_WPM = 60                    # target speed of the human model (5 characters = 1 word)
+HUMAN_SIGMA = 0.4                 # log-normal spread of the per-key delay
+WORD_PAUSE = 2.0                  # extra delay factor after a space or punctuation
+CHUNK_PAUSE = (0.05, 0.15)        # seconds between words in chunked mode
+# ------------------------------------------------
+
+SET_VALUE_JS = """
+const el = arguments[0], value = arguments[1];
+const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+// the native setter, so frameworks that wrap .value still see the change
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+def mode_for(url: str, default: str = DEFAULT_MODE) -> str:
+    return TARGET_MODES.get(urlparse(url).hostname or url, default)
+
+class TypingEngine:
+    def __init__(self, mode: str = DEFAULT_MODE, wpm: float = HUMAN_WPM,
+                 rnd: Optional[random.Random] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown typing mode {mode!r}; choose from {', '.join(MODES)}")
+        self.mode = mode
+        self.wpm = wpm
+        self.rnd = rnd or random.Random()
+
+    def key_delays(self, text: str):
+        """Seconds to wait after each character under the human model."""
+        mean = 60.0 / (self.wpm * 5)
+        # log-normal with the requested mean: mu = ln(mean) - sigma^2 / 2
+        mu = math.log(mean) - HUMAN_SIGMA ** 2 / 2
+        for ch in text:
+            delay = self.rnd.lognormvariate(mu, HUMAN_SIGMA)
+            if ch in " .,;:!?":
+                delay *= WORD_PAUSE
+            yield delay
+
+    def type(self, driver, element, text: str) -> float:
+        """Type `text` into `element`; returns the seconds it took."""
+        t0 = time.perf_counter()
+        if self.mode == "instant":
+            element.send_keys(text)
+        elif self.mode == "js":
+            driver.execute_script(SET_VALUE_JS, element, text)
+        elif self.mode == "chunked":
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                element.send_keys(word if i == len(words) - 1 else word + " ")
+                if i < len(words) - 1:
+                    time.sleep(self.rnd.uniform(*CHUNK_PAUSE))
+        else:
+            actions = ActionChains(driver).click(element)
+            for ch, delay in zip(text, self.key_delays(text)):
+                actions.send_keys(ch).pause(delay)
+            actions.perform()
+        return time.perf_counter() - t0